@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import argparse
-from typing import Optional, Sequence
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Union
 
 from duet_screen.config import Config, PipelineSettings, load_config
 from duet_screen.manifest import log_invocation
@@ -18,39 +19,60 @@ from duet_screen.pipeline import (
 )
 
 
+STAGE_COMMANDS = ("validate", "prep", "dti", "dock", "mmgbsa", "aggregate", "report")
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = _build_parser()
     args = parser.parse_args(argv)
+    run_stage(args.command, args.config, devices=args.devices)
+    return 0
 
-    config = load_config(args.config)
-    devices = _parse_devices(args.devices)
-    if devices is not None:
-        config = config.with_pipeline(config.pipeline.with_devices(devices))
 
-    if args.command == "validate":
+def run_stage(
+    command: str,
+    config_path: Union[str, Path],
+    *,
+    devices: Optional[str] = None,
+    environ: Optional[Mapping[str, str]] = None,
+    rows: Optional[Iterable[Mapping[str, object]]] = None,
+    collect: Optional[List[Dict[str, object]]] = None,
+) -> None:
+    """Run one stage in this process, as ``duet_screen <command> --config ...`` would.
+
+    *environ* supplies the ``HVS_*`` overrides (default ``os.environ``). *collect* receives
+    the rows written by ``dti``/``dock`` and *rows* feeds such rows to ``dock``/``mmgbsa``,
+    so consecutive stages can skip re-reading each other's results files.
+    """
+
+    config = load_config(config_path, environ=environ)
+    parsed_devices = _parse_devices(devices)
+    if parsed_devices is not None:
+        config = config.with_pipeline(config.pipeline.with_devices(parsed_devices))
+
+    if command == "validate":
         run_validate(config)
-    elif args.command == "prep":
+    elif command == "prep":
         run_prep(config)
-    elif args.command == "dti":
-        run_dti(config, devices=devices)
-    elif args.command == "dock":
-        run_docking(config)
-    elif args.command == "mmgbsa":
-        run_mmgbsa(config)
-    elif args.command == "aggregate":
+    elif command == "dti":
+        run_dti(config, devices=parsed_devices, collect=collect)
+    elif command == "dock":
+        run_docking(config, rows=rows, collect=collect)
+    elif command == "mmgbsa":
+        run_mmgbsa(config, rows=rows)
+    elif command == "aggregate":
         run_aggregate(config)
-    elif args.command == "report":
+    elif command == "report":
         run_report(config)
     else:
-        parser.error(f"Unknown command {args.command}")
+        raise ValueError(f"Unknown command {command}")
 
     log_invocation(
         config.paths.manifest,
-        command=args.command,
-        config_path=str(args.config),
-        devices=args.devices,
+        command=command,
+        config_path=str(config_path),
+        devices=devices,
     )
-    return 0
 
 
 def _build_parser() -> argparse.ArgumentParser:
@@ -61,7 +83,7 @@ def _build_parser() -> argparse.ArgumentParser:
     parent.add_argument("--devices", help="Comma-separated list of GPU device ids.")
 
     subparsers = parser.add_subparsers(dest="command", required=True)
-    for command in ("validate", "prep", "dti", "dock", "mmgbsa", "aggregate", "report"):
+    for command in STAGE_COMMANDS:
         subparsers.add_parser(command, parents=[parent])
     return parser
 
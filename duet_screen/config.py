@@ -4,7 +4,9 @@ from __future__ import annotations
 
 import json
 import os
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Tuple, Union
 
@@ -13,7 +15,10 @@ try:
 except Exception:  # pragma: no cover - optional dependency
     yaml = None
 
-from duet_screen.utils import load_csv
+from duet_screen.utils import DATACLASS_SLOTS, iter_csv_columns
+
+# libyaml's loader parses the same safe subset as yaml.safe_load, several times faster.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", None) or getattr(yaml, "SafeLoader", None)
 
 ConfigPrimitive = Union[str, int, float, bool, None]
 ConfigValue = Union[ConfigPrimitive, Sequence["ConfigValue"], Mapping[str, "ConfigValue"]]
@@ -75,7 +80,7 @@ class InputSettings:
     sequences: Path
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class LibraryProtein:
     """Reference protein entry."""
 
@@ -83,7 +88,7 @@ class LibraryProtein:
     sequence: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class LibraryLigand:
     """Reference ligand entry."""
 
@@ -115,6 +120,23 @@ class PathSettings:
     manifest: Path
     reports: Path
 
+    # Derived stage locations are built once per config rather than at every stage entry point.
+    @cached_property
+    def dti_results(self) -> Path:
+        return self.workdir / "dti" / "results.jsonl"
+
+    @cached_property
+    def docking_results(self) -> Path:
+        return self.workdir / "docking" / "results.jsonl"
+
+    @cached_property
+    def mmgbsa_results(self) -> Path:
+        return self.workdir / "mmgbsa" / "results.jsonl"
+
+    @cached_property
+    def aggregate_rankings(self) -> Path:
+        return self.workdir / "aggregate" / "final_rankings.json"
+
 
 @dataclass(frozen=True)
 class Config:
@@ -154,46 +176,95 @@ class Config:
         return Config(pipeline=pipeline, inputs=self.inputs, library=self.library, paths=self.paths)
 
 
-def load_config(path: Union[str, Path]) -> Config:
-    """Load configuration from YAML/JSON with environment overrides."""
+FileFingerprint = Tuple[int, int]
+_ConfigCacheKey = Tuple[Path, FileFingerprint, Tuple[Tuple[str, str], ...]]
+
+_CONFIG_CACHE_SIZE = 32
+_CONFIG_CACHE: "OrderedDict[_ConfigCacheKey, Tuple[Config, Tuple[Optional[FileFingerprint], ...]]]" = OrderedDict()
+
+
+_ENV_PREFIX = "HVS_"
+
+
+def load_config(path: Union[str, Path], *, environ: Optional[Mapping[str, str]] = None) -> Config:
+    """Load configuration from YAML/JSON with environment overrides.
+
+    ``HVS_*`` overrides are read from *environ*, defaulting to ``os.environ``. Results are
+    cached per (file, mtime/size, ``HVS_*`` environment); a cached config is only reused while
+    its library CSVs are also unchanged.
+    """
 
     path = Path(path).expanduser().resolve()
     if not path.exists():
         raise FileNotFoundError(f"Config file not found: {path}")
+    # Scan the environment once; overrides keep environ order, the cache key is sorted.
+    source = os.environ if environ is None else environ
+    overrides = {key: value for key, value in source.items() if key.startswith(_ENV_PREFIX)}
+    env_items = tuple(sorted(overrides.items()))
+    cache_key = (path, _file_fingerprint(path), env_items)
+    cached = _CONFIG_CACHE.get(cache_key)
+    if cached is not None and cached[1] == _library_fingerprints(cached[0]):
+        _CONFIG_CACHE.move_to_end(cache_key)
+        return cached[0]
+
     with path.open("r", encoding="utf-8") as handle:
         raw_text = handle.read()
 
     raw_config = _parse_config_text(raw_text, suffix=path.suffix)
-    _apply_env_overrides(raw_config, os.environ)
+    _apply_env_overrides(raw_config, overrides)
 
     config = _build_config(raw_config, base_dir=path.parent)
+    _CONFIG_CACHE[cache_key] = (config, _library_fingerprints(config))
+    _CONFIG_CACHE.move_to_end(cache_key)
+    while len(_CONFIG_CACHE) > _CONFIG_CACHE_SIZE:
+        _CONFIG_CACHE.popitem(last=False)
     return config
 
 
-def _load_library_proteins(path: Path) -> List[LibraryProtein]:
-    rows = load_csv(path)
+def _file_fingerprint(path: Path) -> FileFingerprint:
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _library_fingerprints(config: Config) -> Tuple[Optional[FileFingerprint], ...]:
+    sources = (config.library.proteins_source, config.library.ligands_source)
+    return tuple(_file_fingerprint(source) if source is not None and source.exists() else None for source in sources)
+
+
+_ID_COLUMNS = ("id", "ID", "zinc_id")
+
+
+def _load_library_proteins(path: Path) -> Tuple[LibraryProtein, ...]:
+    return _read_library_proteins(path, _file_fingerprint(path))
+
+
+def _load_library_ligands(path: Path) -> Tuple[LibraryLigand, ...]:
+    return _read_library_ligands(path, _file_fingerprint(path))
+
+
+# Library CSVs can be many MB; keep the most recent parses keyed by path and mtime/size so
+# reloading a config (or a sibling config sharing the library) does not re-read them.
+@lru_cache(maxsize=4)
+def _read_library_proteins(path: Path, fingerprint: FileFingerprint) -> Tuple[LibraryProtein, ...]:
     proteins: List[LibraryProtein] = []
-    for row in rows:
-        identifier = row.get("id") or row.get("ID") or row.get("zinc_id")
-        sequence = row.get("sequence") or row.get("Sequence")
+    for identifier, sequence in iter_csv_columns(path, _ID_COLUMNS, ("sequence", "Sequence")):
         if not identifier or not sequence:
-            raise ValueError(f"Invalid protein row in {path}: {row}")
-        proteins.append(LibraryProtein(id=str(identifier), sequence=str(sequence)))
-    return proteins
+            raise ValueError(f"Invalid protein row in {path}: id={identifier!r}, sequence={sequence!r}")
+        proteins.append(LibraryProtein(id=identifier, sequence=sequence))
+    return tuple(proteins)
 
 
-def _load_library_ligands(path: Path) -> List[LibraryLigand]:
-    rows = load_csv(path)
+@lru_cache(maxsize=4)
+def _read_library_ligands(path: Path, fingerprint: FileFingerprint) -> Tuple[LibraryLigand, ...]:
     ligands: List[LibraryLigand] = []
-    for row in rows:
-        identifier = row.get("id") or row.get("ID") or row.get("zinc_id")
-        # Accept the `value` column produced by build_ligand_library_from_smi.py, and fall back to
-        # common SMILES headers so externally supplied CSVs remain compatible.
-        smiles = row.get("smiles") or row.get("SMILES") or row.get("Smiles") or row.get("value")
+    # Accept the `value` column produced by build_ligand_library_from_smi.py, and fall back to
+    # common SMILES headers so externally supplied CSVs remain compatible.
+    smiles_columns = ("smiles", "SMILES", "Smiles", "value")
+    for identifier, smiles in iter_csv_columns(path, _ID_COLUMNS, smiles_columns):
         if not identifier or not smiles:
-            raise ValueError(f"Invalid ligand row in {path}: {row}")
-        ligands.append(LibraryLigand(id=str(identifier), smiles=str(smiles)))
-    return ligands
+            raise ValueError(f"Invalid ligand row in {path}: id={identifier!r}, smiles={smiles!r}")
+        ligands.append(LibraryLigand(id=identifier, smiles=smiles))
+    return tuple(ligands)
 
 
 def _parse_config_text(text: str, suffix: str) -> Dict[str, Any]:
@@ -205,7 +276,7 @@ def _parse_config_text(text: str, suffix: str) -> Dict[str, Any]:
     if stripped.startswith("{") or stripped.startswith("["):
         return json.loads(stripped)
     if yaml is not None:
-        return yaml.safe_load(stripped)
+        return yaml.load(stripped, Loader=_YAML_LOADER)
     return _minimal_yaml_parse(stripped)
 
 
@@ -235,10 +306,33 @@ def _minimal_yaml_parse(text: str) -> Dict[str, Any]:
     return data
 
 
+_BOOL_WORDS = frozenset({"true", "false"})
+# int() and float() only accept text starting with one of these (or a Unicode digit or space);
+# "inf"/"nan" spellings are only reachable through _parse_env_value's float() attempt.
+_NUMBER_START = frozenset("+-.0123456789")
+_SPECIAL_FLOAT_START = frozenset("iInN")
+
+
+def _may_be_number(value: str, *, allow_special: bool = False) -> bool:
+    """Cheap pre-check so plain words skip the int()/float() attempts and their exceptions."""
+
+    if not value:
+        return False
+    first = value[0]
+    if first in _NUMBER_START or first.isdigit() or first.isspace():
+        return True
+    return allow_special and first in _SPECIAL_FLOAT_START
+
+
+# Config files repeat the same scalars ("true", "0", "60", ...); caching skips the int()/float()
+# attempts and their exceptions on every repeat.
+@lru_cache(maxsize=512)
 def _coerce_scalar(value: str) -> Any:
     lowered = value.lower()
-    if lowered in {"true", "false"}:
+    if lowered in _BOOL_WORDS:
         return lowered == "true"
+    if not _may_be_number(value):
+        return value
     try:
         if "." in value:
             return float(value)
@@ -249,12 +343,15 @@ def _coerce_scalar(value: str) -> Any:
 
 def _apply_env_overrides(config: MutableMapping[str, Any], env: Mapping[str, str]) -> None:
     """Allow users to override config values via HVS_* environment variables."""
-    prefix = "HVS_"
     for key, value in env.items():
-        if not key.startswith(prefix):
+        if not key.startswith(_ENV_PREFIX):
             continue
-        path = key[len(prefix) :].lower().split("__")
-        _write_nested(config, path, _parse_env_value(value))
+        _write_nested(config, _override_path(key), _parse_env_value(value))
+
+
+@lru_cache(maxsize=128)
+def _override_path(key: str) -> Tuple[str, ...]:
+    return tuple(key[len(_ENV_PREFIX) :].lower().split("__"))
 
 
 def _write_nested(config: MutableMapping[str, Any], path: Sequence[str], value: Any) -> None:
@@ -271,13 +368,14 @@ def _parse_env_value(value: str) -> Any:
     if not value:
         return value
     lowered = value.lower()
-    if lowered in {"true", "false"}:
+    if lowered in _BOOL_WORDS:
         return lowered == "true"
-    for cast in (int, float):
-        try:
-            return cast(value)
-        except ValueError:
-            continue
+    if _may_be_number(value, allow_special=True):
+        for cast in (int, float):
+            try:
+                return cast(value)
+            except ValueError:
+                continue
     if value.startswith("[") and value.endswith("]"):
         inner = value[1:-1].strip()
         if not inner:
@@ -5,6 +5,16 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, Iterable, List, Mapping, MutableMapping, Sequence
 
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+from duet_screen.utils import DATACLASS_SLOTS
+
+# Below this many ranked entries the per-call array setup costs more than the dict loop.
+_NUMPY_FUSION_MIN_ENTRIES = 1024
+
 
 def weighted_average_rank(rank_lists: Sequence[Sequence[str]], weights: Sequence[float]) -> Dict[str, float]:
     """Compute weighted average rank per candidate.
@@ -44,6 +54,8 @@ def weighted_reciprocal_rank_fusion(
         raise ValueError("rank_lists and weights must be the same length.")
     if constant <= 0:
         raise ValueError("constant must be positive.")
+    if np is not None and sum(len(ranking) for ranking in rank_lists) >= _NUMPY_FUSION_MIN_ENTRIES:
+        return _weighted_rrf_numpy(rank_lists, weights, constant)
     fused: MutableMapping[str, float] = {}
     for ranking, weight in zip(rank_lists, weights):
         if weight <= 0:
@@ -53,7 +65,36 @@ def weighted_reciprocal_rank_fusion(
     return dict(sorted(fused.items(), key=lambda item: item[1], reverse=True))
 
 
-@dataclass(frozen=True)
+def _weighted_rrf_numpy(
+    rank_lists: Sequence[Sequence[str]],
+    weights: Sequence[float],
+    constant: int,
+) -> Dict[str, float]:
+    # bincount adds contributions per candidate in list order and the stable argsort keeps
+    # first-seen order for ties, so scores and ordering match the dict loop exactly.
+    index: Dict[str, int] = {}
+    ids: List[int] = []
+    lengths: List[int] = []
+    kept_weights: List[float] = []
+    for ranking, weight in zip(rank_lists, weights):
+        if weight <= 0:
+            continue
+        ids.extend(index.setdefault(candidate, len(index)) for candidate in ranking)
+        lengths.append(len(ranking))
+        kept_weights.append(weight)
+    if not ids:
+        return {}
+    denominators = np.concatenate(
+        [np.arange(constant + 1, constant + 1 + length, dtype=np.float64) for length in lengths]
+    )
+    contributions = np.repeat(np.asarray(kept_weights, dtype=np.float64), lengths) / denominators
+    totals = np.bincount(np.asarray(ids, dtype=np.intp), weights=contributions, minlength=len(index))
+    order = np.argsort(-totals, kind="stable")
+    names = list(index)
+    return {names[position]: score for position, score in zip(order.tolist(), totals[order].tolist())}
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class ConsensusResult:
     """Container for consensus scores mapped to sorted candidate order."""
 
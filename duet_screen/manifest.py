@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import json
 import platform
 import subprocess
 from dataclasses import dataclass
@@ -10,7 +9,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from duet_screen import __version__
-from duet_screen.utils import ensure_directory, git_commit_hash, now_utc_iso
+from duet_screen.utils import dumps_json, git_commit_hash, loads_json, now_utc_iso, write_bytes_atomic
 
 
 @dataclass
@@ -19,13 +18,13 @@ class Manifest:
     data: Dict[str, Any]
 
     def save(self) -> None:
-        ensure_directory(self.path.parent)
-        self.path.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding="utf-8")
+        # Written via rename so an interrupted save never leaves a torn manifest.
+        write_bytes_atomic(self.path, dumps_json(self.data, pretty=True))
 
 
 def load_manifest(path: Path) -> Manifest:
     if path.exists():
-        data = json.loads(path.read_text(encoding="utf-8"))
+        data = loads_json(path.read_bytes())
     else:
         data = _create_manifest_stub()
     return Manifest(path=path, data=data)
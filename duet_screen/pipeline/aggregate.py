@@ -2,156 +2,304 @@
 
 from __future__ import annotations
 
+import hashlib
+import heapq
+import itertools
 import json
-from dataclasses import asdict, dataclass
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, MutableMapping, Optional, Tuple
+from typing import Any, BinaryIO, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
-from duet_screen.config import Config
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+from duet_screen.config import Config, InputSettings, PathSettings, PipelineSettings
 from duet_screen.consensus import weighted_reciprocal_rank_fusion
-from duet_screen.utils import now_utc_iso, read_jsonl
+from duet_screen.utils import chunked, dumps_json, now_utc_iso, read_jsonl
+
+STAGE_NAMES: Tuple[str, ...] = ("dti", "docking", "mmgbsa")
+FUSION_BATCH_SIZE = 256
+
+# (input_id, per-stage snapshots, partner_id -> partner_type shared by all stages)
+StageGroup = Tuple[str, Dict[str, "StageSnapshot"], Dict[str, str]]
 
 
 def run_aggregate(config: Config) -> Path:
-    """Aggregate all stages into a final consensus ranking."""
+    """Aggregate all stages into a final consensus ranking.
 
-    dti_path = Path(config.paths.workdir) / "dti" / "results.jsonl"
-    docking_path = Path(config.paths.workdir) / "docking" / "results.jsonl"
-    mmgbsa_path = Path(config.paths.workdir) / "mmgbsa" / "results.jsonl"
+    Stage outputs are co-iterated in ``input_id`` order and fused in batches, so only a bounded
+    window of inputs is resident at a time; per-input results are streamed straight into the
+    output file. With ``num_workers > 1`` the batches are fused in a process pool.
+    """
 
-    for path in (dti_path, docking_path, mmgbsa_path):
+    stage_paths = {
+        "dti": config.paths.dti_results,
+        "docking": config.paths.docking_results,
+        "mmgbsa": config.paths.mmgbsa_results,
+    }
+    for path in stage_paths.values():
         if not path.exists():
             raise FileNotFoundError(f"Required stage output missing: {path}")
 
-    stage_data = {
-        "dti": _load_stage(dti_path),
-        "docking": _load_stage(docking_path),
-        "mmgbsa": _load_stage(mmgbsa_path),
+    stage_weights = {
+        "dti": config.pipeline.stage_weights.dti,
+        "docking": config.pipeline.stage_weights.docking,
+        "mmgbsa": config.pipeline.stage_weights.mmgbsa,
     }
-
-    stage_weights = [
-        config.pipeline.stage_weights.dti,
-        config.pipeline.stage_weights.docking,
-        config.pipeline.stage_weights.mmgbsa,
-    ]
-    stage_names = ["dti", "docking", "mmgbsa"]
     constant = config.pipeline.consensus_constant
+    # Global ranking columns are filled in one pass while fusing; scores live in a flat double
+    # array so ordering them needs no per-entry tuple.
+    global_inputs: List[str] = []
+    global_partners: List[str] = []
+    global_scores = array("d")
 
-    per_input: List[Dict[str, object]] = []
-    global_entries: List[Tuple[str, str, float]] = []
-
-    input_ids = sorted(
-        set().union(*(data.scores.keys() for data in stage_data.values()))
-    )
-    for input_id in input_ids:
-        rank_lists: List[List[str]] = []
-        weights: List[float] = []
-        per_stage_scores: Dict[str, Dict[str, float]] = {}
-        partner_types: Dict[str, str] = {}
-
-        for name, weight in zip(stage_names, stage_weights):
-            stage = stage_data[name]
-            scores = stage.scores.get(input_id)
-            if not scores:
-                continue
-            ordered = sorted(scores.items(), key=lambda item: item[1], reverse=True)
-            rank_lists.append([item[0] for item in ordered])
-            weights.append(weight)
-            per_stage_scores[name] = {item[0]: float(item[1]) for item in ordered}
-            for partner_id in scores:
-                partner_types[partner_id] = stage.partner_types[input_id][partner_id]
-
-        if not rank_lists:
-            continue
-        # Normalise weights on the fly so partial stage availability (e.g. missing docking output)
-        # still produces a properly weighted fusion.
-        weight_total = sum(weights)
-        normalized_weights = [weight / weight_total for weight in weights] if weight_total else weights
-        fused = weighted_reciprocal_rank_fusion(rank_lists, normalized_weights, constant=constant)
-
-        partners: List[Dict[str, object]] = []
-        for rank, (partner_id, score) in enumerate(fused.items(), start=1):
-            partners.append(
-                {
-                    "partner_id": partner_id,
-                    "partner_type": partner_types.get(partner_id, "unknown"),
-                    "scores": {
-                        name: per_stage_scores.get(name, {}).get(partner_id)
-                        for name in stage_names
-                    },
-                    "consensus_score": score,
-                    "rank": rank,
-                }
-            )
-            global_entries.append((input_id, partner_id, score))
-
-        per_input.append({"input_id": input_id, "partners": partners})
-
-    global_entries.sort(key=lambda item: item[2], reverse=True)
-    global_ranking = [
-        {
-            "input_id": input_id,
-            "partner_id": partner_id,
-            "consensus_score": score,
-            "rank": index,
-        }
-        for index, (input_id, partner_id, score) in enumerate(global_entries, start=1)
-    ]
-
-    snapshot = {
-        "generated_at": now_utc_iso(),
-        "inputs": per_input,
-        "global_ranking": global_ranking,
-        "config_digest": _config_digest(config),
-    }
+    def fused_inputs() -> Iterator[Dict[str, object]]:
+        batches = chunked(_merge_stages(stage_paths), FUSION_BATCH_SIZE)
+        for entries in _fused_batches(batches, stage_weights, constant, config.pipeline.num_workers):
+            for entry in entries:
+                input_id = entry["input_id"]
+                for partner in entry["partners"]:
+                    global_inputs.append(input_id)
+                    global_partners.append(partner["partner_id"])
+                    global_scores.append(partner["consensus_score"])
+                yield entry
 
-    output = Path(config.paths.workdir) / "aggregate" / "final_rankings.json"
+    output = config.paths.aggregate_rankings
     output.parent.mkdir(parents=True, exist_ok=True)
-    output.write_text(json.dumps(snapshot, indent=2, sort_keys=True), encoding="utf-8")
+    with output.open("wb") as handle:
+        handle.write(b'{\n  "config_digest": ' + dumps_json(_config_digest(config)))
+        handle.write(b',\n  "generated_at": ' + dumps_json(now_utc_iso()))
+        handle.write(b',\n  "inputs": ')
+        _write_nested_array(handle, fused_inputs())
+
+        global_ranking = (
+            {
+                "input_id": global_inputs[position],
+                "partner_id": global_partners[position],
+                "consensus_score": global_scores[position],
+                "rank": index,
+            }
+            for index, position in enumerate(_descending_order(global_scores), start=1)
+        )
+        handle.write(b',\n  "global_ranking": ')
+        _write_nested_array(handle, global_ranking)
+        handle.write(b"\n}")
     return output
 
 
 @dataclass
 class StageSnapshot:
-    scores: Dict[str, Dict[str, float]]
-    partner_types: Dict[str, Dict[str, str]]
+    """Scores and ranks emitted by one stage for a single input."""
+
+    scores: Dict[str, float] = field(default_factory=dict)
+    ranks: Dict[str, int] = field(default_factory=dict)
 
+    def ranked(self) -> List[str]:
+        """Partner ids in stage order.
 
-def _load_stage(path: Path) -> StageSnapshot:
-    scores: Dict[str, Dict[str, float]] = {}
-    partner_types: Dict[str, Dict[str, str]] = {}
+        Uses the ``rank`` field every stage already writes, falling back to a single score sort
+        when ranks are missing or do not form a 1..n permutation (e.g. duplicate partner rows).
+        """
+
+        ordered: List[Optional[str]] = [None] * len(self.scores)
+        if len(self.ranks) == len(ordered):
+            for partner_id, rank in self.ranks.items():
+                if not 1 <= rank <= len(ordered) or ordered[rank - 1] is not None:
+                    break
+                ordered[rank - 1] = partner_id
+            else:
+                return ordered  # type: ignore[return-value]
+        return _rank_by_score(self.scores)
+
+
+def _fused_batches(
+    batches: Iterable[List[StageGroup]],
+    stage_weights: Mapping[str, float],
+    constant: int,
+    num_workers: int,
+) -> Iterator[List[Dict[str, object]]]:
+    """Fuse *batches* in order, optionally across a process pool.
+
+    At most ``2 * num_workers`` batches are in flight so the merged stream is never drained
+    into memory ahead of the writer.
+    """
+
+    if num_workers <= 1:
+        for batch in batches:
+            yield _fuse_batch(batch, stage_weights, constant)
+        return
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        pending: Deque[Future] = deque()
+        for batch in batches:
+            pending.append(executor.submit(_fuse_batch, batch, stage_weights, constant))
+            if len(pending) >= 2 * num_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _fuse_batch(
+    batch: Sequence[StageGroup],
+    stage_weights: Mapping[str, float],
+    constant: int,
+) -> List[Dict[str, object]]:
+    entries: List[Dict[str, object]] = []
+    for input_id, stages, partner_types in batch:
+        entry = _fuse_input(input_id, stages, partner_types, stage_weights, constant)
+        if entry is not None:
+            entries.append(entry)
+    return entries
+
+
+def _fuse_input(
+    input_id: str,
+    stages: Mapping[str, StageSnapshot],
+    partner_types: Mapping[str, str],
+    stage_weights: Mapping[str, float],
+    constant: int,
+) -> Optional[Dict[str, object]]:
+    rank_lists: List[List[str]] = []
+    weights: List[float] = []
+    per_stage_scores: Dict[str, Dict[str, float]] = {}
+
+    for name in STAGE_NAMES:
+        stage = stages.get(name)
+        if stage is None or not stage.scores:
+            continue
+        rank_lists.append(stage.ranked())
+        weights.append(stage_weights[name])
+        per_stage_scores[name] = stage.scores
+
+    if not rank_lists:
+        return None
+    # Normalise weights on the fly so partial stage availability (e.g. missing docking output)
+    # still produces a properly weighted fusion.
+    weight_total = sum(weights)
+    normalized_weights = [weight / weight_total for weight in weights] if weight_total else weights
+    # Fusion stays on the dict-based implementation: inputs carry at most top_k partners, and
+    # mapping partner ids to array indices costs more than the arithmetic it would vectorise.
+    fused = weighted_reciprocal_rank_fusion(rank_lists, normalized_weights, constant=constant)
+
+    partners: List[Dict[str, object]] = []
+    for rank, (partner_id, score) in enumerate(fused.items(), start=1):
+        partners.append(
+            {
+                "partner_id": partner_id,
+                "partner_type": partner_types.get(partner_id, "unknown"),
+                "scores": {
+                    name: per_stage_scores.get(name, {}).get(partner_id)
+                    for name in STAGE_NAMES
+                },
+                "consensus_score": score,
+                "rank": rank,
+            }
+        )
+    return {"input_id": input_id, "partners": partners}
+
+
+def _rank_by_score(scores: Mapping[str, float]) -> List[str]:
+    """Return partner ids ordered by descending score, ties kept in insertion order."""
+
+    return sorted(scores, key=scores.__getitem__, reverse=True)
+
+
+def _descending_order(scores: "array[float]") -> Iterable[int]:
+    """Positions of *scores* by descending value, preserving ties stably."""
+
+    if np is None:
+        return sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+    values = np.frombuffer(scores, dtype=np.float64)
+    return np.argsort(-values, kind="stable").tolist()
+
+
+def _merge_stages(stage_paths: Mapping[str, Path]) -> Iterator[StageGroup]:
+    """Co-iterate stage outputs, yielding each ``input_id`` with its per-stage snapshots.
+
+    Every stage file must be ordered by ``input_id``, which all upstream stages guarantee.
+    Partner types go into one dict per input; rows arrive in stage order, so later stages
+    take precedence exactly as when each stage kept its own mapping.
+    """
+
+    streams = [_iter_stage_rows(path, name) for name, path in stage_paths.items()]
+    merged = heapq.merge(*streams, key=itemgetter(0))
+    for input_id, group in itertools.groupby(merged, key=itemgetter(0)):
+        stages: Dict[str, StageSnapshot] = {}
+        partner_types: Dict[str, str] = {}
+        for _, name, row in group:
+            snapshot = stages.setdefault(name, StageSnapshot())
+            partner_id = sys.intern(str(row["partner_id"]))
+            snapshot.scores[partner_id] = float(row["score"])
+            partner_types[partner_id] = str(row.get("partner_type", "unknown"))
+            rank = row.get("rank")
+            if rank is not None:
+                snapshot.ranks[partner_id] = int(rank)
+        yield input_id, stages, partner_types
+
+
+def _iter_stage_rows(path: Path, stage: str) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    previous: Optional[str] = None
     for row in read_jsonl(path):
-        input_id = str(row["input_id"])
-        partner_id = str(row["partner_id"])
-        scores.setdefault(input_id, {})[partner_id] = float(row["score"])
-        partner_types.setdefault(input_id, {})[partner_id] = str(row.get("partner_type", "unknown"))
-    return StageSnapshot(scores=scores, partner_types=partner_types)
+        input_id = sys.intern(str(row["input_id"]))
+        if previous is not None and input_id < previous:
+            raise ValueError(f"{path} is not ordered by input_id; re-run the {stage} stage.")
+        previous = input_id
+        yield input_id, stage, row
+
+
+def _write_nested_array(handle: BinaryIO, items: Iterable[Any], batch_size: int = 4096) -> None:
+    """Write *items* as a pretty-printed JSON array nested one level inside an object.
+
+    Items are encoded *batch_size* at a time as one JSON list and re-indented, so the encoder is
+    entered once per batch instead of once per item; the bytes match per-item encoding.
+    """
+
+    empty = True
+    for batch in chunked(items, batch_size):
+        encoded = dumps_json(batch, pretty=True)
+        # Drop the list's own "[" and "\n]" and shift its elements one level deeper.
+        handle.write(b"[" if empty else b",")
+        handle.write(encoded[1:-2].replace(b"\n", b"\n  "))
+        empty = False
+    handle.write(b"[]" if empty else b"\n  ]")
 
 
 def _config_digest(config: Config) -> str:
+    return _settings_digest(config.pipeline, config.inputs, config.paths)
+
+
+@lru_cache(maxsize=32)
+def _settings_digest(pipeline: PipelineSettings, inputs: InputSettings, paths: PathSettings) -> str:
+    # Keyed on the frozen settings objects rather than the whole Config so the (potentially huge)
+    # library tuples are never hashed; repeated aggregates over the same settings hit the cache.
     data = {
         "pipeline": {
-            "chunk_size": config.pipeline.chunk_size,
-            "num_workers": config.pipeline.num_workers,
-            "devices": config.pipeline.devices,
-            "dti_top_k": config.pipeline.dti_top_k,
-            "docking_top_k": config.pipeline.docking_top_k,
-            "mmgbsa_top_k": config.pipeline.mmgbsa_top_k,
-            "consensus_constant": config.pipeline.consensus_constant,
+            "chunk_size": pipeline.chunk_size,
+            "num_workers": pipeline.num_workers,
+            "devices": pipeline.devices,
+            "dti_top_k": pipeline.dti_top_k,
+            "docking_top_k": pipeline.docking_top_k,
+            "mmgbsa_top_k": pipeline.mmgbsa_top_k,
+            "consensus_constant": pipeline.consensus_constant,
             "stage_weights": {
-                "dti": config.pipeline.stage_weights.dti,
-                "docking": config.pipeline.stage_weights.docking,
-                "mmgbsa": config.pipeline.stage_weights.mmgbsa,
+                "dti": pipeline.stage_weights.dti,
+                "docking": pipeline.stage_weights.docking,
+                "mmgbsa": pipeline.stage_weights.mmgbsa,
             },
         },
-        "inputs": {"sequences": str(config.inputs.sequences)},
+        "inputs": {"sequences": str(inputs.sequences)},
         "paths": {
-            "workdir": str(config.paths.workdir),
-            "manifest": str(config.paths.manifest),
-            "reports": str(config.paths.reports),
+            "workdir": str(paths.workdir),
+            "manifest": str(paths.manifest),
+            "reports": str(paths.reports),
         },
     }
     blob = json.dumps(data, sort_keys=True).encode("utf-8")
-    import hashlib
-
     return hashlib.blake2s(blob, digest_size=12).hexdigest()
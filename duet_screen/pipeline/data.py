@@ -2,43 +2,66 @@
 
 from __future__ import annotations
 
+from itertools import groupby
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 from duet_screen.config import Config, LibraryLigand, LibraryProtein
 from duet_screen.pipeline.models import InputRecord, PartnerRecord
-from duet_screen.utils import load_csv
+from duet_screen.utils import iter_csv_columns
+
+
+# Maps parsed type strings to the interned literals so every record shares one object.
+_INPUT_TYPES = {"protein": "protein", "ligand": "ligand"}
 
 
 def load_input_records(config: Config) -> List[InputRecord]:
     """Load user inputs from CSV."""
 
     records: List[InputRecord] = []
-    for row in load_csv(config.inputs.sequences):
-        identifier = row.get("id")
-        entry_type = row.get("type")
-        value = row.get("value")
+    columns = iter_csv_columns(config.inputs.sequences, ("id",), ("type",), ("value",))
+    for identifier, entry_type, value in columns:
         if not identifier or not entry_type or not value:
             raise ValueError("Input row missing required fields (id, type, value).")
-        if entry_type not in {"protein", "ligand"}:
+        canonical_type = _INPUT_TYPES.get(entry_type)
+        if canonical_type is None:
             raise ValueError(f"Invalid input type {entry_type}; expected 'protein' or 'ligand'.")
-        records.append(InputRecord(id=identifier, type=entry_type, value=value))
+        records.append(InputRecord(id=identifier, type=canonical_type, value=value))
     if not records:
         raise ValueError("No input records found.")
     return records
 
 
-def library_partners(config: Config, target_type: str) -> List[PartnerRecord]:
+# Partner records per library tuple, keyed by (id(items), type).  The tuple itself is
+# kept alongside so a recycled id never returns records for a different library.
+_PARTNER_CACHE: Dict[Tuple[int, str], Tuple[tuple, Tuple[PartnerRecord, ...]]] = {}
+_PARTNER_CACHE_SIZE = 8
+
+
+def library_partners(config: Config, target_type: str) -> Tuple[PartnerRecord, ...]:
     """Return library partners of opposite type."""
 
     if target_type == "protein":
-        return [PartnerRecord(id=item.id, type="protein", value=item.sequence) for item in config.library.proteins]
-    if target_type == "ligand":
-        return [PartnerRecord(id=item.id, type="ligand", value=item.smiles) for item in config.library.ligands]
-    raise ValueError(f"Unsupported partner type: {target_type}")
+        items: tuple = config.library.proteins
+    elif target_type == "ligand":
+        items = config.library.ligands
+    else:
+        raise ValueError(f"Unsupported partner type: {target_type}")
+    key = (id(items), target_type)
+    cached = _PARTNER_CACHE.get(key)
+    if cached is not None and cached[0] is items:
+        return cached[1]
+    if target_type == "protein":
+        records = tuple(PartnerRecord(id=item.id, type="protein", value=item.sequence) for item in items)
+    else:
+        records = tuple(PartnerRecord(id=item.id, type="ligand", value=item.smiles) for item in items)
+    if len(_PARTNER_CACHE) >= _PARTNER_CACHE_SIZE:
+        _PARTNER_CACHE.clear()
+    _PARTNER_CACHE[key] = (items, records)
+    return records
 
 
-def opposite_partners(config: Config, input_type: str) -> List[PartnerRecord]:
+def opposite_partners(config: Config, input_type: str) -> Tuple[PartnerRecord, ...]:
     """Return partners that can bind to *input_type*."""
 
     if input_type == "protein":
@@ -46,3 +69,28 @@ def opposite_partners(config: Config, input_type: str) -> List[PartnerRecord]:
     if input_type == "ligand":
         return library_partners(config, "protein")
     raise ValueError(f"Invalid input type {input_type}.")
+
+
+def group_rows_by_input(
+    rows: Iterable[Mapping[str, object]], label: str, stage: str
+) -> Iterator[Tuple[str, List[Mapping[str, object]]]]:
+    """Yield (input_id, rows) per input from stage results ordered by input_id.
+
+    Rows are grouped as they are read, so only one input's candidates are held at a time;
+    *stage* names the stage to re-run when *label* turns out not to be ordered.
+    """
+
+    previous: Optional[str] = None
+    for input_id, group in groupby(rows, key=lambda row: str(row["input_id"])):
+        if previous is not None and input_id <= previous:
+            raise ValueError(f"{label} is not ordered by input_id; re-run the {stage} stage.")
+        previous = input_id
+        yield input_id, list(group)
+
+
+def collect_rows(rows: Iterable[Dict[str, object]], sink: List[Dict[str, object]]) -> Iterator[Dict[str, object]]:
+    """Pass *rows* through, appending each one to *sink* on the way."""
+
+    for row in rows:
+        sink.append(row)
+        yield row
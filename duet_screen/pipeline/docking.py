@@ -2,47 +2,60 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
+import heapq
+from operator import itemgetter
 from pathlib import Path
-from typing import DefaultDict, Dict, Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 from duet_screen.config import Config
-from duet_screen.utils import deterministic_score, read_jsonl, write_jsonl
+from duet_screen.pipeline.data import collect_rows, group_rows_by_input
+from duet_screen.utils import deterministic_scores, read_jsonl, write_jsonl
+
+
+def run_docking(
+    config: Config,
+    source: Optional[Path] = None,
+    *,
+    rows: Optional[Iterable[Mapping[str, object]]] = None,
+    collect: Optional[List[Dict[str, object]]] = None,
+) -> Path:
+    """Simulate docking and persist results.
+
+    *rows* may carry DTI results already in memory (see ``run_dti(collect=...)``); otherwise
+    they are streamed from *source* or the configured DTI results file. *collect* receives
+    the written rows for :func:`run_mmgbsa`, as in :func:`run_dti`.
+    """
+
+    if rows is not None:
+        label = "in-memory DTI rows"
+    else:
+        source_path = source or config.paths.dti_results
+        if not source_path.exists():
+            raise FileNotFoundError(f"DTI results missing: {source_path}")
+        rows = read_jsonl(source_path)
+        label = str(source_path)
 
-
-def run_docking(config: Config, source: Optional[Path] = None) -> Path:
-    """Simulate docking and persist results."""
-
-    source_path = source or (Path(config.paths.workdir) / "dti" / "results.jsonl")
-    if not source_path.exists():
-        raise FileNotFoundError(f"DTI results missing: {source_path}")
-
-    grouped: DefaultDict[str, List[Dict[str, object]]] = defaultdict(list)
-    for row in read_jsonl(source_path):
-        grouped[str(row["input_id"])].append(dict(row))
-
-    rows: List[Dict[str, object]] = []
     top_k = max(1, config.pipeline.docking_top_k)
-    for input_id, candidates in grouped.items():
-        scored = []
-        for item in candidates:
-            # Docking scores are also simulated via deterministic hashes so repeated runs
-            # produce identical rankings without requiring external binaries.
-            score = deterministic_score(str(item["input_id"]), str(item["partner_id"]), "docking")
-            scored.append((item, score))
-        scored.sort(key=lambda entry: entry[1], reverse=True)
-        for rank, (item, score) in enumerate(scored[:top_k], start=1):
-            rows.append(
-                {
-                    "input_id": item["input_id"],
-                    "partner_id": item["partner_id"],
-                    "partner_type": item["partner_type"],
-                    "stage": "docking",
-                    "score": score,
-                    "rank": rank,
-                }
-            )
-
-    output = Path(config.paths.workdir) / "docking" / "results.jsonl"
-    write_jsonl(output, rows)
+    output = config.paths.docking_results
+    results: Iterable[Dict[str, object]] = _docking_rows(group_rows_by_input(rows, label, "dti"), top_k)
+    if collect is not None:
+        results = collect_rows(results, collect)
+    write_jsonl(output, results)
     return output
+
+
+def _docking_rows(groups: Iterable[Tuple[str, List[Mapping[str, object]]]], top_k: int) -> Iterator[Dict[str, object]]:
+    for input_id, candidates in groups:
+        # Docking scores are also simulated via deterministic hashes so repeated runs
+        # produce identical rankings without requiring external binaries.
+        scores = deterministic_scores([(input_id, str(item["partner_id"])) for item in candidates], "docking")
+        top = heapq.nlargest(top_k, zip(candidates, scores), key=itemgetter(1))
+        for rank, (item, score) in enumerate(top, start=1):
+            yield {
+                "input_id": item["input_id"],
+                "partner_id": item["partner_id"],
+                "partner_type": item["partner_type"],
+                "stage": "docking",
+                "score": score,
+                "rank": rank,
+            }
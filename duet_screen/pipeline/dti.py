@@ -2,20 +2,33 @@
 
 from __future__ import annotations
 
+import heapq
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 from duet_screen.config import Config
-from duet_screen.pipeline.data import load_input_records, opposite_partners
+from duet_screen.pipeline.data import collect_rows, load_input_records, opposite_partners
 from duet_screen.pipeline.models import InputRecord, PartnerRecord
 from duet_screen.scheduler import GPUScheduler, Task
-from duet_screen.utils import chunked, deterministic_score, write_jsonl
+from duet_screen.utils import chunked, deterministic_scores_for, encode_score_tails, write_jsonl
 
 
-def run_dti(config: Config, devices: Optional[Sequence[int]] = None) -> Path:
-    """Run DTI scoring. Returns path to JSONL results."""
+def run_dti(
+    config: Config,
+    devices: Optional[Sequence[int]] = None,
+    *,
+    collect: Optional[List[Dict[str, object]]] = None,
+) -> Path:
+    """Run DTI scoring. Returns path to JSONL results.
 
-    inputs = load_input_records(config)
+    When *collect* is given, every written row is also appended to it so an in-process caller
+    can hand the rows to :func:`run_docking` without re-reading the file.
+    """
+
+    # Score inputs in id order so the results file is grouped and sorted by input_id,
+    # which lets downstream stages stream it.
+    inputs = sorted(load_input_records(config), key=lambda record: record.id)
     target_devices = devices or config.pipeline.devices
     scheduler = GPUScheduler(target_devices, max_retries=0)
     chunk_size = max(1, config.pipeline.chunk_size)
@@ -27,11 +40,13 @@ def run_dti(config: Config, devices: Optional[Sequence[int]] = None) -> Path:
     def worker(task: Task[List[InputRecord]], device: int) -> List[Dict[str, object]]:
         return _score_chunk(config, task.payload)
 
-    results = scheduler.dispatch(tasks, worker)
-    rows: List[Dict[str, object]] = []
-    for _, device, payload in results:
-        rows.extend(payload)
-    output_path = Path(config.paths.workdir) / "dti" / "results.jsonl"
+    # Rows are written chunk by chunk as the scheduler finishes them.
+    rows: Iterable[Dict[str, object]] = (
+        row for _, _, payload in scheduler.iter_dispatch(tasks, worker) for row in payload
+    )
+    if collect is not None:
+        rows = collect_rows(rows, collect)
+    output_path = config.paths.dti_results
     write_jsonl(output_path, rows)
     return output_path
 
@@ -39,25 +54,32 @@ def run_dti(config: Config, devices: Optional[Sequence[int]] = None) -> Path:
 def _score_chunk(config: Config, chunk: Sequence[InputRecord]) -> List[Dict[str, object]]:
     rows: List[Dict[str, object]] = []
     top_k = max(1, config.pipeline.dti_top_k)
+    # Partner values are encoded once per chunk and type, not once per input record.
+    partners_by_type: Dict[str, Tuple[Sequence[PartnerRecord], Tuple[bytes, ...]]] = {}
     for record in chunk:
-        partners = opposite_partners(config, record.type)
-        ranked = _rank_partners(record, partners, top_k)
+        entry = partners_by_type.get(record.type)
+        if entry is None:
+            partners = opposite_partners(config, record.type)
+            tails = encode_score_tails((partner.value for partner in partners), "dti")
+            entry = partners_by_type[record.type] = (partners, tails)
+        ranked = _rank_partners(record, entry[0], top_k, entry[1])
         rows.extend(ranked)
     return rows
 
 
-def _rank_partners(record: InputRecord, partners: Sequence[PartnerRecord], top_k: int) -> List[Dict[str, object]]:
+def _rank_partners(
+    record: InputRecord,
+    partners: Sequence[PartnerRecord],
+    top_k: int,
+    tails: Optional[Sequence[bytes]] = None,
+) -> List[Dict[str, object]]:
     # The simulator uses a deterministic hash-based score so outputs stay reproducible
     # regardless of platform or execution order.
-    scored = [
-        (
-            partner,
-            deterministic_score(record.value, partner.value, "dti"),
-        )
-        for partner in partners
-    ]
-    scored.sort(key=lambda item: item[1], reverse=True)
-    limited = scored[: top_k]
+    if tails is None:
+        tails = encode_score_tails((partner.value for partner in partners), "dti")
+    scores = deterministic_scores_for(record.value, tails)
+    # nlargest matches sorted(..., reverse=True)[:top_k], ties included, in O(n log k).
+    limited = heapq.nlargest(top_k, zip(partners, scores), key=itemgetter(1))
     rows: List[Dict[str, object]] = []
     for rank, (partner, score) in enumerate(limited, start=1):
         rows.append(
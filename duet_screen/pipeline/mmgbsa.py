@@ -2,47 +2,56 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
+import heapq
+from operator import itemgetter
 from pathlib import Path
-from typing import DefaultDict, Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 from duet_screen.config import Config
-from duet_screen.utils import deterministic_score, read_jsonl, write_jsonl
+from duet_screen.pipeline.data import group_rows_by_input
+from duet_screen.utils import deterministic_scores, read_jsonl, write_jsonl
+
+
+def run_mmgbsa(
+    config: Config,
+    source: Optional[Path] = None,
+    *,
+    rows: Optional[Iterable[Mapping[str, object]]] = None,
+) -> Path:
+    """Simulate MM/GBSA scoring.
+
+    *rows* may carry docking results already in memory (see ``run_docking(collect=...)``);
+    otherwise they are streamed from *source* or the configured docking results file.
+    """
+
+    if rows is not None:
+        label = "in-memory docking rows"
+    else:
+        source_path = source or config.paths.docking_results
+        if not source_path.exists():
+            raise FileNotFoundError(f"Docking results missing: {source_path}")
+        rows = read_jsonl(source_path)
+        label = str(source_path)
 
-
-def run_mmgbsa(config: Config, source: Optional[Path] = None) -> Path:
-    """Simulate MM/GBSA scoring."""
-
-    source_path = source or (Path(config.paths.workdir) / "docking" / "results.jsonl")
-    if not source_path.exists():
-        raise FileNotFoundError(f"Docking results missing: {source_path}")
-
-    grouped: DefaultDict[str, List[Dict[str, object]]] = defaultdict(list)
-    for row in read_jsonl(source_path):
-        grouped[str(row["input_id"])].append(dict(row))
-
-    rows: List[Dict[str, object]] = []
     top_k = max(1, config.pipeline.mmgbsa_top_k)
-    for input_id, candidates in grouped.items():
-        scored = []
-        for item in candidates:
-            # Simulated MM/GBSA scoring mirrors the deterministic approach used by the
-            # other stages for repeatability.
-            score = deterministic_score(str(item["input_id"]), str(item["partner_id"]), "mmgbsa")
-            scored.append((item, score))
-        scored.sort(key=lambda entry: entry[1], reverse=True)
-        for rank, (item, score) in enumerate(scored[:top_k], start=1):
-            rows.append(
-                {
-                    "input_id": item["input_id"],
-                    "partner_id": item["partner_id"],
-                    "partner_type": item["partner_type"],
-                    "stage": "mmgbsa",
-                    "score": score,
-                    "rank": rank,
-                }
-            )
-
-    output = Path(config.paths.workdir) / "mmgbsa" / "results.jsonl"
-    write_jsonl(output, rows)
+    output = config.paths.mmgbsa_results
+    write_jsonl(output, _mmgbsa_rows(group_rows_by_input(rows, label, "dock"), top_k))
     return output
+
+
+def _mmgbsa_rows(groups: Iterable[Tuple[str, List[Mapping[str, object]]]], top_k: int) -> Iterator[Dict[str, object]]:
+    for input_id, candidates in groups:
+        # Simulated MM/GBSA scoring mirrors the deterministic approach used by the
+        # other stages for repeatability; the whole candidate set is hashed in one batch.
+        scores = deterministic_scores([(input_id, str(item["partner_id"])) for item in candidates], "mmgbsa")
+        # nlargest is O(n log k) and keeps the stable tie order of a full descending sort.
+        top = heapq.nlargest(top_k, zip(candidates, scores), key=itemgetter(1))
+        for rank, (item, score) in enumerate(top, start=1):
+            yield {
+                "input_id": item["input_id"],
+                "partner_id": item["partner_id"],
+                "partner_type": item["partner_type"],
+                "stage": "mmgbsa",
+                "score": score,
+                "rank": rank,
+            }
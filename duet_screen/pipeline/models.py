@@ -5,10 +5,12 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Literal, Optional
 
+from duet_screen.utils import DATACLASS_SLOTS
+
 PartnerType = Literal["protein", "ligand"]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class InputRecord:
     """User supplied sequence or SMILES entry."""
 
@@ -17,7 +19,7 @@ class InputRecord:
     value: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class PartnerRecord:
     """Library partner entry."""
 
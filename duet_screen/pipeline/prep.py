@@ -2,20 +2,20 @@
 
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Iterable, List
+import os
+from typing import Tuple
 
 from duet_screen.config import Config
 from duet_screen.utils import ensure_directory
 
 
-WORK_SUBDIRS: List[str] = ["dti", "docking", "mmgbsa", "aggregate", "logs"]
+WORK_SUBDIRS: Tuple[str, ...] = ("dti", "docking", "mmgbsa", "aggregate", "logs")
 
 
 def run_prep(config: Config) -> None:
     """Prepare working directories."""
 
-    ensure_directory(config.paths.workdir)
-    ensure_directory(config.paths.reports)
+    # Creating each subdirectory also creates the workdir itself, so no separate call is needed.
     for name in WORK_SUBDIRS:
-        ensure_directory(Path(config.paths.workdir) / name)
+        os.makedirs(config.paths.workdir / name, exist_ok=True)
+    ensure_directory(config.paths.reports)
@@ -2,28 +2,29 @@
 
 from __future__ import annotations
 
-import json
+import shutil
 from pathlib import Path
 from typing import Dict, List
 
 from duet_screen.config import Config
-from duet_screen.utils import ensure_directory
+from duet_screen.utils import ensure_directory, loads_json
 
 
 def run_report(config: Config) -> Path:
     """Generate report files from aggregated rankings."""
 
-    aggregate_path = Path(config.paths.workdir) / "aggregate" / "final_rankings.json"
+    aggregate_path = config.paths.aggregate_rankings
     if not aggregate_path.exists():
         raise FileNotFoundError(f"Aggregate results missing: {aggregate_path}")
 
-    data = json.loads(aggregate_path.read_text(encoding="utf-8"))
-
     ensure_directory(config.paths.reports)
-    report_json = Path(config.paths.reports) / "report.json"
-    report_json.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    report_json = config.paths.reports / "report.json"
+    # The JSON report is the aggregate snapshot verbatim, so copy bytes instead of re-encoding.
+    shutil.copyfile(aggregate_path, report_json)
+
+    data = loads_json(aggregate_path.read_bytes())
 
-    report_txt = Path(config.paths.reports) / "report.txt"
+    report_txt = config.paths.reports / "report.txt"
     lines: List[str] = []
     lines.append("DUET-Screen Report")
     lines.append("==================")
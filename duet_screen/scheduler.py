@@ -2,9 +2,36 @@
 
 from __future__ import annotations
 
+import threading
 from collections import deque
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
-from typing import Callable, Deque, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from duet_screen.utils import DATACLASS_SLOTS
+
+EXECUTORS = ("serial", "thread", "process")
+
+# Process pools are shared by size, so repeated dispatch calls in one process do not pay
+# worker start-up every time; they shut themselves down at exit. Thread pools are cheap
+# to start and stay per call, which keeps a worker free to dispatch nested work.
+_PROCESS_POOLS: Dict[int, ProcessPoolExecutor] = {}
+_PROCESS_POOLS_LOCK = threading.Lock()
+
+
+def _shared_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    with _PROCESS_POOLS_LOCK:
+        pool = _PROCESS_POOLS.get(max_workers)
+        if pool is None:
+            pool = _PROCESS_POOLS[max_workers] = ProcessPoolExecutor(max_workers=max_workers)
+        return pool
+
+
+def _discard_process_pool(max_workers: int, pool: ProcessPoolExecutor) -> None:
+    with _PROCESS_POOLS_LOCK:
+        if _PROCESS_POOLS.get(max_workers) is pool:
+            del _PROCESS_POOLS[max_workers]
+    pool.shutdown(wait=False, cancel_futures=True)
 
 
 class RetryableError(Exception):
@@ -15,7 +42,7 @@ T = TypeVar("T")
 R = TypeVar("R")
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Task:
     """Work unit scheduled onto a device."""
 
@@ -26,13 +53,23 @@ class Task:
 
 
 class GPUScheduler:
-    """Round-robin scheduler with retry semantics."""
+    """Round-robin scheduler with retry semantics.
 
-    def __init__(self, devices: Sequence[int], *, max_retries: int = 1):
+    ``executor`` selects how tasks run: ``"serial"`` (default) calls the worker inline,
+    ``"thread"`` and ``"process"`` run up to one task per device in a pool. The process
+    pool needs a picklable worker and is kept for later dispatch calls. Results are yielded
+    in the same order in every mode. :meth:`dispatch_workstealing` instead lets each device
+    pull the next task when it becomes free.
+    """
+
+    def __init__(self, devices: Sequence[int], *, max_retries: int = 1, executor: str = "serial"):
         if not devices:
             raise ValueError("At least one device id is required.")
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor!r}; expected one of {', '.join(EXECUTORS)}.")
         self._devices = tuple(devices)
         self._max_retries = max_retries
+        self._executor = executor
 
     @property
     def devices(self) -> Tuple[int, ...]:
@@ -48,23 +85,122 @@ class GPUScheduler:
         Returns list of (task, device, worker_result).
         """
 
-        results: List[Tuple[Task, int, R]] = []
+        return list(self.iter_dispatch(tasks, worker))
+
+    def iter_dispatch(
+        self,
+        tasks: Iterable[Task],
+        worker: Callable[[Task, int], R],
+    ) -> Iterator[Tuple[Task, int, R]]:
+        """Like :meth:`dispatch`, but yield each (task, device, result) as it finishes."""
+
         queue: Deque[Task] = deque(tasks)
         device_iter = self._device_infinite_iterator()
+        if self._executor != "serial":
+            yield from self._pooled_dispatch(queue, worker, device_iter)
+            return
 
         while queue:
             task = queue.popleft()
             device = next(device_iter)
             try:
                 result = worker(task, device)
-                results.append((task, device, result))
-            except RetryableError:
-                task.attempts += 1
-                if task.attempts > self._max_retries:
-                    raise
-                queue.append(task)
+            except RetryableError as error:
+                self._requeue(queue, task, error)
+                continue
+            yield task, device, result
+
+    def dispatch_workstealing(
+        self,
+        tasks: Iterable[Task],
+        worker: Callable[[Task, int], R],
+    ) -> List[Tuple[Task, int, R]]:
+        """Run *tasks* with one thread per device, each taking the next queued task when free.
+
+        Suits tasks of uneven cost: a fast device simply processes more of them. Retried
+        tasks go back on the shared queue and may land on any device. Results are returned
+        in completion order, so placement and order depend on timing. The first error
+        stops the remaining devices once their running tasks finish and is then raised.
+        """
+
+        queue: Deque[Task] = deque(tasks)
+        lock = threading.Lock()
+        results: List[Tuple[Task, int, R]] = []
+        errors: List[BaseException] = []
+
+        def run(device: int) -> None:
+            while True:
+                with lock:
+                    if errors or not queue:
+                        return
+                    task = queue.popleft()
+                try:
+                    result = worker(task, device)
+                except RetryableError as error:
+                    with lock:
+                        try:
+                            self._requeue(queue, task, error)
+                        except RetryableError as exhausted:
+                            errors.append(exhausted)
+                    continue
+                except BaseException as error:
+                    with lock:
+                        errors.append(error)
+                    return
+                with lock:
+                    results.append((task, device, result))
+
+        threads = [threading.Thread(target=run, args=(device,), daemon=True) for device in self._devices]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
         return results
 
+    def _pooled_dispatch(
+        self,
+        queue: Deque[Task],
+        worker: Callable[[Task, int], R],
+        device_iter: Iterator[int],
+    ) -> Iterator[Tuple[Task, int, R]]:
+        # One task per device is in flight, and results are taken from the oldest
+        # submission first, so devices, retries and output order match the serial loop.
+        pending: Deque[Tuple[Task, int, Future]] = deque()
+        workers = len(self._devices)
+        shared = self._executor == "process"
+        pool: Executor = _shared_process_pool(workers) if shared else ThreadPoolExecutor(max_workers=workers)
+        try:
+            while queue or pending:
+                while queue and len(pending) < len(self._devices):
+                    task = queue.popleft()
+                    device = next(device_iter)
+                    pending.append((task, device, pool.submit(worker, task, device)))
+                task, device, future = pending.popleft()
+                try:
+                    result = future.result()
+                except RetryableError as error:
+                    self._requeue(queue, task, error)
+                    continue
+                yield task, device, result
+        except BrokenExecutor:
+            if shared:
+                _discard_process_pool(workers, pool)
+            raise
+        finally:
+            if shared:
+                # Leave the shared pool idle: drop queued work and wait for running tasks.
+                wait([future for _, _, future in pending if not future.cancel()])
+            else:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def _requeue(self, queue: Deque[Task], task: Task, error: RetryableError) -> None:
+        task.attempts += 1
+        if task.attempts > self._max_retries:
+            raise error
+        queue.append(task)
+
     def _device_infinite_iterator(self) -> Iterator[int]:
         while True:
             for device in self._devices:
@@ -5,9 +5,25 @@ from __future__ import annotations
 
 import argparse
 import csv
+import io
+import itertools
+import math
 import random
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from typing import Deque, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+# Tranche files read ahead of the parser; file reads release the GIL, so a few threads
+# keep the disk busy while the main thread splits lines.
+READ_AHEAD_FILES = 8
+# Rows are joined in batches of this size before each write.
+WRITE_BATCH_ROWS = 8192
 
 
 def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
@@ -52,48 +68,178 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     if args.random_sample:
         sampler = random.Random(args.seed)
 
-    entries = iter_tranche_entries(input_dir, skip_missing=args.skip_missing)
-
     if limit is not None and args.random_sample:
+        entries = _SkippableEntries(input_dir, skip_missing=args.skip_missing)
         selected = reservoir_sample(entries, limit, sampler or random.Random())
-        count = len(selected)
         with output_path.open("w", newline="", encoding="utf-8") as handle:
-            writer = csv.writer(handle)
-            writer.writerow(["id", "type", "value"])
-            for smiles, zinc_id in selected:
-                writer.writerow([zinc_id, "ligand", smiles])
+            count = write_ligand_rows(handle, selected)
     else:
-        count = 0
+        entries = iter_tranche_entries(input_dir, skip_missing=args.skip_missing)
+        if limit is not None:
+            entries = itertools.islice(entries, limit)
         with output_path.open("w", newline="", encoding="utf-8") as handle:
-            writer = csv.writer(handle)
-            writer.writerow(["id", "type", "value"])
-            for smiles, zinc_id in entries:
-                writer.writerow([zinc_id, "ligand", smiles])
-                count += 1
-                if limit is not None and count >= limit:
-                    break
+            count = write_ligand_rows(handle, entries)
 
     print(f"Wrote {count} ligands to {output_path}")
     return 0
 
 
 def iter_tranche_entries(directory: Path, *, skip_missing: bool = False) -> Iterator[Tuple[str, str]]:
-    for path in sorted(directory.rglob("*.smi")):
-        with path.open("r", encoding="utf-8") as handle:
-            for line_number, line in enumerate(handle, start=1):
-                stripped = line.strip()
-                if not stripped:
-                    continue
-                if line_number == 1 and stripped.lower().startswith("smiles"):
-                    continue
-                parts = stripped.split()
-                if len(parts) < 2:
-                    if skip_missing:
-                        continue
-                    raise ValueError(f"Unexpected format in {path}:{line_number}: {line!r}")
-                smiles = parts[0]
-                zinc_id = parts[1]
-                yield smiles, zinc_id
+    for path, text in _read_tranche_files(sorted(directory.rglob("*.smi"))):
+        yield from _parse_tranche_text(path, text, skip_missing=skip_missing)
+
+
+def _parse_tranche_text(path: Path, text: str, *, skip_missing: bool) -> Iterator[Tuple[str, str]]:
+    for line_number, line in enumerate(io.StringIO(text), start=1):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if line_number == 1 and stripped.lower().startswith("smiles"):
+            continue
+        parts = stripped.split()
+        if len(parts) < 2:
+            if skip_missing:
+                continue
+            raise ValueError(f"Unexpected format in {path}:{line_number}: {line!r}")
+        smiles = parts[0]
+        zinc_id = parts[1]
+        yield smiles, zinc_id
+
+
+def _entry_spans(text: str) -> Optional[Tuple[List[int], List[int]]]:
+    """Return (starts, ends) of the entry lines in *text* when every one has two fields.
+
+    Files with blank or short lines, or non-ASCII text, return None and are parsed line by line.
+    """
+
+    if np is None or not text.isascii():
+        return None
+    data = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    # What str.split treats as whitespace in ASCII: space, \t..\r and \x1c..\x1f.
+    blank = (data == 32) | ((data - 9) <= 4) | ((data - 28) <= 3)
+    newlines = np.flatnonzero(data == 10)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.append(newlines, len(data))
+    if starts[-1] == ends[-1]:
+        starts, ends = starts[:-1], ends[:-1]
+    if not len(ends):
+        return None
+    field_starts = np.flatnonzero(blank[:-1] & ~blank[1:]) + 1
+    if not blank[0]:
+        field_starts = np.concatenate(([0], field_starts))
+    fields = np.bincount(np.searchsorted(ends, field_starts), minlength=len(ends))
+    if text[: ends[0]].strip().lower().startswith("smiles"):
+        starts, ends, fields = starts[1:], ends[1:], fields[1:]
+    if not len(ends) or fields.min() < 2:
+        return None
+    return starts.tolist(), ends.tolist()
+
+
+class _SkippableEntries:
+    """Tranche entries in :func:`iter_tranche_entries` order that can skip ahead cheaply.
+
+    Files made only of valid entry lines are skipped by index, and only the lines that are
+    actually returned get split; other files are parsed line by line as usual.
+    """
+
+    def __init__(self, directory: Path, *, skip_missing: bool = False):
+        self._files = _read_tranche_files(sorted(directory.rglob("*.smi")))
+        self._skip_missing = skip_missing
+        self._text = ""
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._position = 0
+        self._parsed: Optional[Iterator[Tuple[str, str]]] = None
+
+    def __iter__(self) -> "_SkippableEntries":
+        return self
+
+    def __next__(self) -> Tuple[str, str]:
+        while True:
+            if self._position < len(self._ends):
+                index = self._position
+                self._position += 1
+                parts = self._text[self._starts[index] : self._ends[index]].split()
+                return parts[0], parts[1]
+            if self._parsed is not None:
+                entry = next(self._parsed, None)
+                if entry is not None:
+                    return entry
+            self._load_next_file()
+
+    def skip(self, count: int) -> None:
+        """Drop the next *count* entries (fewer if the input runs out)."""
+
+        while count > 0:
+            if self._position < len(self._ends):
+                taken = min(count, len(self._ends) - self._position)
+                self._position += taken
+                count -= taken
+                continue
+            if self._parsed is not None:
+                count -= sum(1 for _ in itertools.islice(self._parsed, count))
+                if count == 0:
+                    return
+            try:
+                self._load_next_file()
+            except StopIteration:
+                return
+
+    def _load_next_file(self) -> None:
+        path, text = next(self._files)
+        spans = _entry_spans(text)
+        self._text, self._position = text, 0
+        self._starts, self._ends = spans or ([], [])
+        self._parsed = None if spans is not None else _parse_tranche_text(path, text, skip_missing=self._skip_missing)
+
+
+def write_ligand_rows(handle: TextIO, entries: Iterable[Tuple[str, str]]) -> int:
+    """Write the ligand CSV header and rows to *handle*; return the number of rows.
+
+    Output matches ``csv.writer``. Rows are formatted directly, and only fields that
+    contain a comma or quote go through the csv module for quoting.
+    """
+
+    quoting = csv.writer(handle)
+    handle.write("id,type,value\r\n")
+    count = 0
+    batch: List[str] = []
+    for smiles, zinc_id in entries:
+        if "," in smiles or '"' in smiles or "," in zinc_id or '"' in zinc_id:
+            handle.write("".join(batch))
+            batch.clear()
+            quoting.writerow([zinc_id, "ligand", smiles])
+        else:
+            batch.append(f"{zinc_id},ligand,{smiles}\r\n")
+            if len(batch) >= WRITE_BATCH_ROWS:
+                handle.write("".join(batch))
+                batch.clear()
+        count += 1
+    handle.write("".join(batch))
+    return count
+
+
+def _read_tranche_files(paths: Sequence[Path]) -> Iterator[Tuple[Path, str]]:
+    """Yield (path, text) in order, reading up to READ_AHEAD_FILES files in the background."""
+
+    if len(paths) <= 1:
+        for path in paths:
+            yield path, path.read_text(encoding="utf-8")
+        return
+    with ThreadPoolExecutor(max_workers=min(READ_AHEAD_FILES, len(paths))) as executor:
+        pending: Deque[Tuple[Path, Future]] = deque()
+        remaining = iter(paths)
+        for path in remaining:
+            pending.append((path, executor.submit(path.read_text, encoding="utf-8")))
+            if len(pending) >= READ_AHEAD_FILES:
+                break
+        while pending:
+            path, future = pending.popleft()
+            text = future.result()
+            next_path = next(remaining, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(next_path.read_text, encoding="utf-8")))
+            yield path, text
 
 
 def reservoir_sample(
@@ -101,17 +247,37 @@ def reservoir_sample(
     k: int,
     rng: random.Random,
 ) -> List[Tuple[str, str]]:
-    reservoir: List[Tuple[str, str]] = []
-    # Classic reservoir sampling: keep the first k entries, then randomly replace existing ones
-    # with decreasing probability.  Ensures every ligand has equal probability of inclusion.
-    for index, entry in enumerate(iterable):
-        if index < k:
-            reservoir.append(entry)
-            continue
-        j = rng.randint(0, index)
-        if j < k:
-            reservoir[j] = entry
-    return reservoir
+    iterator = iter(iterable)
+    reservoir: List[Tuple[str, str]] = list(itertools.islice(iterator, k))
+    if len(reservoir) < k:
+        return reservoir
+    # Vitter's algorithm L: keep the first k entries, then jump straight to the next entry
+    # that replaces one, drawing O(k log(N/k)) random numbers instead of one per entry.
+    # Every ligand still has equal probability of inclusion.  log_w tracks log(w) so
+    # w = exp(log_w) never rounds up to 1 for large k.
+    log_w = math.log(_open_unit(rng)) / k
+    while True:
+        skip = math.floor(math.log(_open_unit(rng)) / math.log(-math.expm1(log_w)))
+        skip_ahead = getattr(iterator, "skip", None)
+        if skip_ahead is not None:
+            skip_ahead(skip)
+        else:
+            # Drain the skipped entries in C without materialising them.
+            deque(itertools.islice(iterator, skip), maxlen=0)
+        entry = next(iterator, None)
+        if entry is None:
+            return reservoir
+        reservoir[rng.randrange(k)] = entry
+        log_w += math.log(_open_unit(rng)) / k
+
+
+def _open_unit(rng: random.Random) -> float:
+    """Uniform draw from the open interval (0, 1)."""
+
+    value = rng.random()
+    while value == 0.0:
+        value = rng.random()
+    return value
 
 
 if __name__ == "__main__":
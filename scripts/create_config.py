@@ -8,11 +8,19 @@ import json
 from pathlib import Path
 from typing import Dict, Optional
 
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
 try:
     import yaml  # type: ignore
 except Exception:  # pragma: no cover - optional dependency
     yaml = None
 
+# Prefer the libyaml-backed dumper; it emits the same safe subset as yaml.safe_dump.
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", None) or getattr(yaml, "SafeDumper", None)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Create a DUET-Screen configuration file.")
@@ -132,11 +140,14 @@ def main() -> int:
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     if output_format == "json":
-        output_path.write_text(json.dumps(config, indent=2), encoding="utf-8")
+        if orjson is not None:
+            output_path.write_bytes(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        else:
+            output_path.write_text(json.dumps(config, indent=2), encoding="utf-8")
     elif output_format in {"yaml", "yml"}:
         if yaml is None:
             raise RuntimeError("PyYAML is required to write YAML configs. Install with `pip install pyyaml`.")
-        output_path.write_text(yaml.safe_dump(config, sort_keys=False), encoding="utf-8")
+        output_path.write_text(yaml.dump(config, Dumper=_YAML_DUMPER, sort_keys=False), encoding="utf-8")
     else:
         raise ValueError(f"Unsupported format '{output_format}'. Use json or yaml.")
 
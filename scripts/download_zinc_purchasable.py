@@ -5,9 +5,12 @@ from __future__ import annotations
 
 import argparse
 import math
+import os
+import shutil
 import sys
+from contextlib import suppress
 from pathlib import Path
-from typing import List, Optional, Sequence
+from typing import BinaryIO, List, Optional, Sequence
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 if str(SCRIPT_DIR) not in sys.path:
@@ -75,6 +78,8 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     runs = math.ceil(args.total / args.per_run)
     pages_per_run = math.ceil(args.per_run / args.chunk_size)
     collected_files: List[Path] = []
+    # One session for all runs keeps the keep-alive connection to ZINC warm between them.
+    session = fetch_zinc_ligands.build_session()
 
     for run_idx in range(runs):
         run_total = min(args.per_run, args.total - run_idx * args.per_run)
@@ -82,25 +87,17 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         chunk_path = tmp_dir / f"zinc_pd_chunk_{run_idx+1:03d}.csv"
         collected_files.append(chunk_path)
 
-        fetch_args = [
-            "--output",
-            str(chunk_path),
-            "--count",
-            str(run_total),
-            "--chunk-size",
-            str(args.chunk_size),
-            "--delay",
-            str(args.delay),
-            "--subsets",
-            "purchasable",
-            "druglike",
-            "--pipeline-ready",
-            "--page-start",
-            str(page_start),
-        ]
-
         print(f"[run {run_idx+1}/{runs}] fetching {run_total} ligands starting at page {page_start}")
-        status = fetch_zinc_ligands.main(fetch_args)
+        status = fetch_zinc_ligands.run(
+            output=str(chunk_path),
+            count=run_total,
+            chunk_size=args.chunk_size,
+            delay=args.delay,
+            subsets=["purchasable", "druglike"],
+            pipeline_ready=True,
+            page_start=page_start,
+            session=session,
+        )
         if status != 0:
             print(f"Fetch run {run_idx+1} failed with status {status}", file=sys.stderr)
             return status
@@ -110,10 +107,8 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
     if not args.keep_temp:
         for path in collected_files:
-            try:
-                path.unlink()
-            except FileNotFoundError:
-                pass
+            with suppress(FileNotFoundError):
+                os.unlink(path)
 
     return 0
 
@@ -122,14 +117,36 @@ def _concatenate_csv(chunks: Sequence[Path], destination: Path) -> None:
     if not chunks:
         raise ValueError("No chunk files provided for concatenation.")
 
-    with destination.open("w", encoding="utf-8") as dest:
-        dest.write("id,type,value\n")
+    with destination.open("wb") as dest:
         for idx, chunk in enumerate(chunks, start=1):
-            with chunk.open("r", encoding="utf-8") as source:
-                for line_no, line in enumerate(source, start=1):
-                    if idx > 1 and line_no == 1:
-                        continue  # skip header
-                    dest.write(line)
+            with chunk.open("rb") as source:
+                # Every chunk starts with the same header line: the first chunk supplies it
+                # (keeping csv.writer's \r\n), the rest skip theirs.
+                header = source.readline()
+                if idx == 1:
+                    dest.write(header or b"id,type,value\r\n")
+                    dest.flush()
+                _copy_bytes(source, dest, offset=len(header))
+
+
+def _copy_bytes(source: BinaryIO, dest: BinaryIO, *, offset: int) -> None:
+    """Append *source* from *offset* to the end onto *dest*, in the kernel where possible."""
+
+    remaining = os.fstat(source.fileno()).st_size - offset
+    if hasattr(os, "sendfile"):
+        try:
+            while remaining > 0:
+                sent = os.sendfile(dest.fileno(), source.fileno(), offset, remaining)
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+            return
+        except OSError:
+            pass  # e.g. filesystems without sendfile support; finish with a buffered copy
+    source.seek(offset)
+    shutil.copyfileobj(source, dest, length=1 << 20)
+    dest.flush()
 
 
 if __name__ == "__main__":
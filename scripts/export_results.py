@@ -5,13 +5,27 @@ from __future__ import annotations
 
 import argparse
 import csv
+import itertools
 import json
 import math
+import mmap
+import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import xlsxwriter  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    xlsxwriter = None
 
 try:
     from openpyxl import Workbook
+    from openpyxl.workbook.child import avoid_duplicate_name
 except ImportError as exc:  # pragma: no cover - runtime dependency
     raise SystemExit("openpyxl is required. Install with `pip install .[report]` or `pip install openpyxl`.") from exc
 
@@ -19,8 +33,8 @@ except ImportError as exc:  # pragma: no cover - runtime dependency
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Export aggregate rankings to JSON/Excel.")
     parser.add_argument("--aggregate", required=True, help="Path to aggregate/final_rankings.json.")
-    parser.add_argument("--output-json", required=True, help="Destination JSON path.")
-    parser.add_argument("--output-xlsx", required=True, help="Destination Excel path.")
+    parser.add_argument("--output-json", help="Destination JSON path.")
+    parser.add_argument("--output-xlsx", help="Destination Excel path.")
     parser.add_argument(
         "--input-id",
         action="append",
@@ -40,7 +54,10 @@ def parse_args() -> argparse.Namespace:
         "--protein-library",
         help="Optional CSV file with columns id/value for proteins (adds sequences to export).",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not args.output_json and not args.output_xlsx:
+        parser.error("at least one of --output-json or --output-xlsx is required")
+    return args
 
 
 def main() -> int:
@@ -50,15 +67,22 @@ def main() -> int:
     if not aggregate_path.exists():
         raise FileNotFoundError(f"Aggregate file not found: {aggregate_path}")
 
-    with aggregate_path.open("r", encoding="utf-8") as handle:
-        data = json.load(handle)
+    data = _load_aggregate(aggregate_path)
 
     inputs = data.get("inputs", [])
     selected_inputs = set(args.input_id) if args.input_id else None
     export_rows: Dict[str, List[Dict[str, Any]]] = {}
+    # Per-partner score statistics, computed once and shared by the JSON and Excel writers.
+    export_stats: Dict[str, List[Dict[str, Any]]] = {}
 
     ligand_values = _load_value_map(args.ligand_library) if args.ligand_library else {}
     protein_values = _load_value_map(args.protein_library) if args.protein_library else {}
+    # Only non-empty maps are kept, so inputs without a library skip the partner scan entirely.
+    value_maps = {
+        partner_type: values
+        for partner_type, values in (("ligand", ligand_values), ("protein", protein_values))
+        if values
+    }
 
     for entry in inputs:
         input_id = entry.get("input_id")
@@ -67,25 +91,26 @@ def main() -> int:
         if selected_inputs and input_id not in selected_inputs:
             continue
         partners = entry.get("partners", [])
-        enriched: List[Dict[str, Any]] = []
-        for partner in partners[: args.limit]:
-            partner_copy = dict(partner)
-            partner_type = partner_copy.get("partner_type")
-            value = None
-            if partner_type == "ligand" and ligand_values:
-                value = ligand_values.get(str(partner_copy.get("partner_id")))
-            elif partner_type == "protein" and protein_values:
-                value = protein_values.get(str(partner_copy.get("partner_id")))
-            if value is not None:
-                partner_copy["value"] = value
-            enriched.append(partner_copy)
+        # The loaded aggregate is not reused, so partner dicts are enriched in place.
+        enriched: List[Dict[str, Any]] = partners[: args.limit]
+        if value_maps:
+            for partner in enriched:
+                values = value_maps.get(partner.get("partner_type"))
+                if values is None:
+                    continue
+                value = values.get(str(partner.get("partner_id")))
+                if value is not None:
+                    partner["value"] = value
         export_rows[input_id] = enriched
+        export_stats[input_id] = [_score_stats(partner.get("scores") or {}) for partner in enriched]
 
     if not export_rows:
         raise ValueError("No inputs matched the export criteria.")
 
-    _write_json(Path(args.output_json), export_rows, data)
-    _write_excel(Path(args.output_xlsx), export_rows)
+    if args.output_json:
+        _write_json(Path(args.output_json), export_rows, data, export_stats)
+    if args.output_xlsx:
+        _write_excel(Path(args.output_xlsx), export_rows, export_stats)
 
     print(
         f"Exported {sum(len(rows) for rows in export_rows.values())} partner rows "
@@ -94,88 +119,163 @@ def main() -> int:
     return 0
 
 
-def _write_json(path: Path, export_rows: Dict[str, List[Dict[str, Any]]], original: Dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    payload = {
-        "generated_at": original.get("generated_at"),
-        "config_digest": original.get("config_digest"),
-        "inputs": [
-            {
-                "input_id": input_id,
-                "partners": [
-                    {
-                        **partner,
-                        "analysis": _score_stats(partner.get("scores") or {}),
-                    }
-                    for partner in partners
-                ],
-            }
-            for input_id, partners in export_rows.items()
-        ],
-    }
-    with path.open("w", encoding="utf-8") as handle:
-        json.dump(payload, handle, indent=2)
+def _load_aggregate(path: Path) -> Dict[str, Any]:
+    if orjson is None:
+        with path.open("r", encoding="utf-8") as handle:
+            return json.load(handle)
+    with path.open("rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return orjson.loads(b"")  # raises the usual decode error; mmap rejects empty files
+        # Parse straight from the page cache instead of copying the file into a bytes object.
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return orjson.loads(view)
+            finally:
+                view.release()
 
 
-def _write_excel(path: Path, export_rows: Dict[str, List[Dict[str, Any]]]) -> None:
+def _write_json(
+    path: Path,
+    export_rows: Dict[str, List[Dict[str, Any]]],
+    original: Dict[str, Any],
+    export_stats: Dict[str, List[Dict[str, Any]]],
+) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    workbook = Workbook()
-    # Remove the default sheet
-    default_sheet = workbook.active
-    workbook.remove(default_sheet)
-
-    header = [
-        "rank",
-        "partner_id",
-        "partner_type",
-        "value",
-        "consensus_score",
-        "dti_score",
-        "docking_score",
-        "mmgbsa_score",
-        "stages_present",
-        "stage_count",
-        "stage_mean",
-        "stage_min",
-        "stage_max",
-        "stage_std",
-    ]
+    # The payload is emitted one input at a time so only a single input's partner block is
+    # encoded in memory; the bytes match dumping the whole payload with indent=2.
+    with path.open("wb") as handle:
+        handle.write(b'{\n  "generated_at": ')
+        handle.write(_dumps_pretty(original.get("generated_at")))
+        handle.write(b',\n  "config_digest": ')
+        handle.write(_dumps_pretty(original.get("config_digest")))
+        handle.write(b',\n  "inputs": [')
+        first = True
+        for input_id, partners in export_rows.items():
+            # The partner dicts belong to this export (see main), so the analysis is attached in
+            # place; assigning the key gives the same key order as the {**partner, ...} copy did.
+            for partner, stats in zip(partners, export_stats[input_id]):
+                partner["analysis"] = stats
+            entry = {"input_id": input_id, "partners": partners}
+            handle.write(b"\n    " if first else b",\n    ")
+            handle.write(_dumps_pretty(entry).replace(b"\n", b"\n    "))
+            first = False
+        handle.write(b"]\n}" if first else b"\n  ]\n}")
 
-    for input_id, partners in export_rows.items():
-        sheet_name = _sanitize_sheet_name(input_id)
-        worksheet = workbook.create_sheet(title=sheet_name)
-        worksheet.append(header)
-        for partner in partners:
-            scores = partner.get("scores") or {}
-            stats = _score_stats(scores)
-            worksheet.append(
-                [
-                    partner.get("rank"),
-                    partner.get("partner_id"),
-                    partner.get("partner_type"),
-                    partner.get("value"),
-                    partner.get("consensus_score"),
-                    scores.get("dti"),
-                    scores.get("docking"),
-                    scores.get("mmgbsa"),
-                    ",".join(stats["stages_present"]),
-                    stats["stage_count"],
-                    stats["mean"],
-                    stats["min"],
-                    stats["max"],
-                    stats["std"],
-                ]
-            )
 
+def _dumps_pretty(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2)
+    return json.dumps(value, indent=2).encode("utf-8")
+
+
+_EXCEL_HEADER = [
+    "rank",
+    "partner_id",
+    "partner_type",
+    "value",
+    "consensus_score",
+    "dti_score",
+    "docking_score",
+    "mmgbsa_score",
+    "stages_present",
+    "stage_count",
+    "stage_mean",
+    "stage_min",
+    "stage_max",
+    "stage_std",
+]
+
+
+def _write_excel(
+    path: Path,
+    export_rows: Dict[str, List[Dict[str, Any]]],
+    export_stats: Dict[str, List[Dict[str, Any]]],
+) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if xlsxwriter is not None:
+        # Sheet titles get openpyxl's duplicate renaming up front; xlsxwriter is used only
+        # when it accepts every resulting title (openpyxl tolerates a few it rejects).
+        sheet_names: List[str] = []
+        for input_id in export_rows:
+            sheet_names.append(avoid_duplicate_name(sheet_names, _sanitize_sheet_name(input_id)))
+        if _xlsxwriter_accepts(sheet_names):
+            _write_excel_xlsxwriter(path, export_rows, export_stats, sheet_names)
+            return
+    # Rows are only appended, so a write-only workbook streams them without Cell objects.
+    # It also starts without the default sheet.
+    workbook = Workbook(write_only=True)
+    for input_id, partners in export_rows.items():
+        worksheet = workbook.create_sheet(title=_sanitize_sheet_name(input_id))
+        worksheet.append(_EXCEL_HEADER)
+        for row in _excel_rows(partners, export_stats[input_id]):
+            worksheet.append(row)
     workbook.save(path)
 
 
+def _write_excel_xlsxwriter(
+    path: Path,
+    export_rows: Dict[str, List[Dict[str, Any]]],
+    export_stats: Dict[str, List[Dict[str, Any]]],
+    sheet_names: List[str],
+) -> None:
+    # constant_memory flushes each row as it is written; URLs stay plain strings and NaN/inf
+    # scores are left blank, which is how the openpyxl export reads back.
+    workbook = xlsxwriter.Workbook(str(path), {"constant_memory": True, "strings_to_urls": False})
+    for sheet_name, (input_id, partners) in zip(sheet_names, export_rows.items()):
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.add_write_handler(float, _write_float_cell)
+        worksheet.write_row(0, 0, _EXCEL_HEADER)
+        for index, row in enumerate(_excel_rows(partners, export_stats[input_id]), start=1):
+            worksheet.write_row(index, 0, row)
+    workbook.close()
+
+
+def _write_float_cell(worksheet: Any, row: int, col: int, value: float, cell_format: Any = None) -> Any:
+    if math.isfinite(value):
+        return None
+    return worksheet.write_blank(row, col, None, cell_format)
+
+
+def _xlsxwriter_accepts(sheet_names: List[str]) -> bool:
+    folded = [name.lower() for name in sheet_names]
+    return len(set(folded)) == len(folded) and all(
+        len(name) <= 31 and not name.startswith("'") and not name.endswith("'") and name != "history"
+        for name in folded
+    )
+
+
+def _excel_rows(partners: List[Dict[str, Any]], stats_rows: List[Dict[str, Any]]) -> Iterator[List[Any]]:
+    for partner, stats in zip(partners, stats_rows):
+        scores = partner.get("scores") or {}
+        yield [
+            partner.get("rank"),
+            partner.get("partner_id"),
+            partner.get("partner_type"),
+            partner.get("value"),
+            partner.get("consensus_score"),
+            scores.get("dti"),
+            scores.get("docking"),
+            scores.get("mmgbsa"),
+            ",".join(stats["stages_present"]),
+            stats["stage_count"],
+            stats["mean"],
+            stats["min"],
+            stats["max"],
+            stats["std"],
+        ]
+
+
 def _sanitize_sheet_name(name: str) -> str:
     invalid = set('[]:*?/\\')
     cleaned = "".join(ch if ch not in invalid else "_" for ch in name)
     return cleaned[:31] or "Sheet1"
 
 
+_ID_COLUMNS = ("id", "ID", "zinc_id")
+_VALUE_COLUMNS = ("value", "smiles", "SMILES", "sequence")
+
+
 def _load_value_map(path_str: Optional[str]) -> Dict[str, str]:
     if not path_str:
         return {}
@@ -184,21 +284,68 @@ def _load_value_map(path_str: Optional[str]) -> Dict[str, str]:
         raise FileNotFoundError(f"Library file not found: {path}")
     value_map: Dict[str, str] = {}
     with path.open("r", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        for row in reader:
-            identifier = row.get("id") or row.get("ID") or row.get("zinc_id")
-            value = row.get("value") or row.get("smiles") or row.get("SMILES") or row.get("sequence")
-            if not identifier or not value:
-                continue
-            value_map[str(identifier)] = value
+        rows = _iter_csv_rows(handle)
+        header = next(rows, None)
+        if header is None:
+            return value_map
+        positions = {name: index for index, name in enumerate(header)}
+        id_columns = [positions[name] for name in _ID_COLUMNS if name in positions]
+        value_columns = [positions[name] for name in _VALUE_COLUMNS if name in positions]
+        if not id_columns or not value_columns:
+            return value_map
+        if len(id_columns) == 1 and len(value_columns) == 1:
+            # Fast path: a single id and value column, indexed directly.
+            id_index, value_index = id_columns[0], value_columns[0]
+            width = max(id_index, value_index) + 1
+            for fields in rows:
+                if len(fields) < width:
+                    continue
+                identifier = fields[id_index]
+                value = fields[value_index]
+                if identifier and value:
+                    value_map[identifier] = value
+            return value_map
+        for fields in rows:
+            identifier = _first_field(fields, id_columns)
+            value = _first_field(fields, value_columns)
+            if identifier and value:
+                value_map[identifier] = value
     return value_map
 
 
+def _iter_csv_rows(handle: Iterator[str]) -> Iterator[List[str]]:
+    """Yield non-empty CSV rows, splitting plain lines on commas until a quote shows up."""
+    for line in handle:
+        if '"' in line:
+            # Quoted fields may hold commas or span lines; the csv module takes over from here.
+            for row in csv.reader(itertools.chain((line,), handle)):
+                if row:
+                    yield row
+            return
+        line = line.rstrip("\n")
+        if line:
+            yield line.split(",")
+
+
+def _first_field(fields: List[str], indices: List[int]) -> Optional[str]:
+    for index in indices:
+        if index < len(fields) and fields[index]:
+            return fields[index]
+    return None
+
+
 def _score_stats(scores: Dict[str, Optional[float]]) -> Dict[str, Any]:
     """Return basic descriptive statistics for the available stage scores."""
-    stages_present = sorted(stage for stage, value in scores.items() if value is not None)
-    values = [float(value) for value in scores.values() if value is not None]
-    if not values:
+    # One scan of the dict; values keep dict order so the sums below are unchanged.
+    stages_present: List[str] = []
+    values: List[float] = []
+    for stage, value in scores.items():
+        if value is not None:
+            stages_present.append(stage)
+            values.append(float(value))
+    stages_present.sort()
+    count = len(values)
+    if not count:
         return {
             "stages_present": stages_present,
             "stage_count": 0,
@@ -207,11 +354,12 @@ def _score_stats(scores: Dict[str, Optional[float]]) -> Dict[str, Any]:
             "max": None,
             "std": None,
         }
-    mean = sum(values) / len(values)
-    variance = sum((value - mean) ** 2 for value in values) / len(values)
+    mean = sum(values) / count
+    # At most three stages, so a list beats a generator for the second pass.
+    variance = sum([(value - mean) ** 2 for value in values]) / count
     return {
         "stages_present": stages_present,
-        "stage_count": len(values),
+        "stage_count": count,
         "mean": mean,
         "min": min(values),
         "max": max(values),
@@ -5,14 +5,20 @@ from __future__ import annotations
 
 import argparse
 import csv
+import itertools
 import sys
 import tarfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence, Tuple
+from typing import Deque, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = "https://zinc15.docking.org/substances.txt"
 
@@ -21,6 +27,7 @@ BASE_URL = "https://zinc15.docking.org/substances.txt"
 class FetchResult:
     ligands: List[Tuple[str, str]]
     exhausted: bool
+    throttled: bool = False
 
 
 def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
@@ -58,6 +65,12 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default=0.5,
         help="Delay between API calls to avoid overwhelming the service (seconds).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Pages fetched concurrently; request starts stay --delay apart (default: 4).",
+    )
     parser.add_argument(
         "--pipeline-ready",
         action="store_true",
@@ -74,8 +87,37 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     args = parse_args(argv)
+    return run(
+        output=args.output,
+        count=args.count,
+        chunk_size=args.chunk_size,
+        where=args.where,
+        subsets=args.subsets,
+        catalogs=args.catalogs,
+        delay=args.delay,
+        workers=args.workers,
+        pipeline_ready=args.pipeline_ready,
+        page_start=args.page_start,
+    )
+
 
-    if args.subsets and "druglike" in args.subsets and "purchasable" in args.subsets:
+def run(
+    *,
+    output: str,
+    count: int = 100,
+    chunk_size: int = 50,
+    where: Optional[str] = None,
+    subsets: Optional[Sequence[str]] = None,
+    catalogs: Optional[Sequence[str]] = None,
+    delay: float = 0.5,
+    workers: int = 4,
+    pipeline_ready: bool = False,
+    page_start: int = 1,
+    session: Optional[requests.Session] = None,
+) -> int:
+    """Fetch *count* ligands into *output*; pass *session* to reuse its connections across runs."""
+
+    if subsets and "druglike" in subsets and "purchasable" in subsets:
         print(
             "ZINC Rsync/TAR downloads are required for purchasable+druglike. "
             "Use download_zinc_purchasable.py to fetch via rsync.",
@@ -83,46 +125,125 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         )
         return 2
 
-    output_path = Path(args.output).expanduser().resolve()
+    output_path = Path(output).expanduser().resolve()
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    collected: List[Tuple[str, str]] = []
-    page = max(1, args.page_start)
-
-    session = requests.Session()
+    if session is None:
+        session = build_session()
     headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; DUET-Screen/0.1; +https://github.com/keunsoo/04_dtidock)"
+        "User-Agent": "Mozilla/5.0 (compatible; DUET-Screen/0.1; +https://github.com/keunsoo/04_dtidock)",
+        "Accept-Encoding": "gzip, deflate",
     }
 
-    while len(collected) < args.count:
-        remaining = args.count - len(collected)
-        chunk_size = min(args.chunk_size, remaining)
+    def fetch(page: int, limit: int) -> FetchResult:
+        limiter.wait()
         result = _fetch_page(
             session=session,
             page=page,
-            limit=chunk_size,
+            limit=limit,
             headers=headers,
-            where=args.where,
-            subsets=args.subsets,
-            catalogs=args.catalogs,
+            where=where,
+            subsets=subsets,
+            catalogs=catalogs,
         )
-        if not result.ligands:
-            break
-        collected.extend(result.ligands[:remaining])
-        page += 1
-        if result.exhausted:
-            break
-        time.sleep(max(0.0, args.delay))
+        if result.throttled:
+            limiter.back_off()
+        else:
+            limiter.recover()
+        return result
+
+    limiter = _RateLimiter(delay)
+    collected: List[Tuple[str, str]] = []
+    # Pages are planned as if every one comes back full; processing stops at the first short
+    # page, so the plan matches what a page-by-page loop would have requested.
+    plan = iter(_page_plan(max(1, page_start), count, chunk_size))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending: Deque[Future] = deque()
+        for page, limit in itertools.islice(plan, max(1, workers)):
+            pending.append(executor.submit(fetch, page, limit))
+        while pending:
+            result = pending.popleft().result()
+            remaining = count - len(collected)
+            if not result.ligands:
+                break
+            collected.extend(result.ligands[:remaining])
+            if result.exhausted or len(collected) >= count:
+                break
+            upcoming = next(plan, None)
+            if upcoming is not None:
+                pending.append(executor.submit(fetch, *upcoming))
+        for future in pending:
+            future.cancel()
 
     if not collected:
         print("No ligands retrieved from ZINC. Check query parameters.", file=sys.stderr)
         return 1
 
-    _write_output(output_path, collected, pipeline_ready=args.pipeline_ready)
+    _write_output(output_path, collected, pipeline_ready=pipeline_ready)
     print(f"Wrote {len(collected)} ligands to {output_path}")
     return 0
 
 
+def _page_plan(first_page: int, count: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Yield (page, limit) pairs covering *count* ligands in pages of *chunk_size*."""
+
+    page = first_page
+    while count > 0:
+        limit = min(chunk_size, count)
+        yield page, limit
+        count -= limit
+        page += 1
+
+
+class _RateLimiter:
+    """Space request start times at least *delay* seconds apart across threads.
+
+    The spacing doubles (up to ``MAX_DELAY``) while ZINC answers with HTTP 429 and halves back
+    towards *delay* once requests go through unthrottled again.
+    """
+
+    MAX_DELAY = 30.0
+    MIN_BACKOFF = 0.5
+
+    def __init__(self, delay: float):
+        self._base_delay = max(0.0, delay)
+        self._delay = self._base_delay
+        self._lock = threading.Lock()
+        self._next_start: Optional[float] = None
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = now if self._next_start is None else max(now, self._next_start)
+            self._next_start = start + self._delay
+        if start > now:
+            time.sleep(start - now)
+
+    def back_off(self) -> None:
+        with self._lock:
+            self._delay = min(max(self._delay * 2, self.MIN_BACKOFF), max(self.MAX_DELAY, self._base_delay))
+
+    def recover(self) -> None:
+        with self._lock:
+            halved = self._delay / 2
+            self._delay = halved if halved >= max(self._base_delay, self.MIN_BACKOFF) else self._base_delay
+
+
+def build_session() -> requests.Session:
+    """Session reusing one keep-alive connection, retrying transient ZINC failures."""
+
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        # Hand the last response back so raise_for_status() reports it as before.
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
+
+
 def _fetch_page(
     *,
     session: requests.Session,
@@ -151,9 +272,10 @@ def _fetch_page(
 
     response = session.get(endpoint, headers=headers, params=params, timeout=60)
     response.raise_for_status()
+    throttled = _was_throttled(response)
     text = response.text.strip()
     if not text:
-        return FetchResult(ligands=[], exhausted=True)
+        return FetchResult(ligands=[], exhausted=True, throttled=throttled)
     if text.lstrip().startswith("<"):
         raise RuntimeError("Received unexpected HTML response from ZINC. Adjust query parameters.")
 
@@ -164,20 +286,36 @@ def _fetch_page(
             continue
         ligands.append((parts[0], parts[1]))
     exhausted = len(ligands) < limit
-    return FetchResult(ligands=ligands, exhausted=exhausted)
+    return FetchResult(ligands=ligands, exhausted=exhausted, throttled=throttled)
+
+
+def _was_throttled(response: requests.Response) -> bool:
+    """Whether urllib3 had to retry this request after an HTTP 429."""
+
+    retries = getattr(response.raw, "retries", None)
+    return any(entry.status == 429 for entry in getattr(retries, "history", ()) or ())
 
 
 def _write_output(path: Path, ligands: Iterable[Tuple[str, str]], *, pipeline_ready: bool) -> None:
+    # Same bytes as csv.writer: rows are formatted directly and only fields that need quoting
+    # go through the csv module.
     with path.open("w", newline="", encoding="utf-8") as handle:
         writer = csv.writer(handle)
-        if pipeline_ready:
-            writer.writerow(["id", "type", "value"])
-            for zinc_id, smiles in ligands:
-                writer.writerow([zinc_id, "ligand", smiles])
-        else:
-            writer.writerow(["id", "smiles"])
-            for zinc_id, smiles in ligands:
-                writer.writerow([zinc_id, smiles])
+        handle.write("id,type,value\r\n" if pipeline_ready else "id,smiles\r\n")
+        middle = ",ligand," if pipeline_ready else ","
+        lines: List[str] = []
+        for zinc_id, smiles in ligands:
+            if _needs_quoting(zinc_id) or _needs_quoting(smiles):
+                handle.write("".join(lines))
+                lines.clear()
+                writer.writerow([zinc_id, "ligand", smiles] if pipeline_ready else [zinc_id, smiles])
+            else:
+                lines.append(f"{zinc_id}{middle}{smiles}\r\n")
+        handle.write("".join(lines))
+
+
+def _needs_quoting(field: str) -> bool:
+    return "," in field or '"' in field or "\n" in field or "\r" in field or not field
 
 
 if __name__ == "__main__":
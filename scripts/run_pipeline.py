@@ -4,23 +4,51 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import os
+import shlex
 import shutil
 import subprocess
 import sys
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, Sequence
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
 
 try:
     import yaml  # type: ignore
 except Exception:  # pragma: no cover - optional dependency already required elsewhere
     yaml = None
 
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+# libyaml's loader parses the same safe subset as yaml.safe_load, several times faster.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", None) or getattr(yaml, "SafeLoader", None)
 
+# Each stage reads what the previous one wrote (dock ranks DTI hits, mmgbsa rescores docking
+# hits), so the stages form a chain and run in this order.
 STAGES = ["validate", "prep", "dti", "dock", "mmgbsa", "aggregate", "report"]
 
+# Results each stage leaves in the workdir; report writes into the reports directory instead.
+STAGE_OUTPUTS: Dict[str, Tuple[str, ...]] = {
+    "validate": (),
+    "prep": (),
+    "dti": ("dti/results.jsonl",),
+    "dock": ("docking/results.jsonl",),
+    "mmgbsa": ("mmgbsa/results.jsonl",),
+    "aggregate": ("aggregate/final_rankings.json",),
+    "report": (),
+}
+REPORT_OUTPUTS = ("report.json", "report.txt")
+
+# Sibling helper scripts (sampling builder, exporter) live next to this file.
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
 
 def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run the full DUET-Screen pipeline sequentially.")
@@ -82,6 +110,30 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default=50,
         help="Max partners per input when exporting (default: 50).",
     )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run the duet_screen stages inside this process instead of one subprocess per stage.",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log the full command line of every subprocess instead of one progress line.",
+    )
+    parser.add_argument(
+        "--stage-timings",
+        help="Append one JSON line per step (wall/CPU seconds, peak RSS) to this file.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip leading stages whose outputs are current for the same config, overrides and inputs.",
+    )
+    parser.add_argument(
+        "--force-rerun",
+        default="",
+        help="Comma-separated stages to rerun (with everything after them) under --incremental.",
+    )
     parser.add_argument(
         "--aggregate-path",
         help="Override aggregate JSON path; defaults to workspace/aggregate/final_rankings.json derived from config.",
@@ -91,7 +143,11 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     args = parse_args(argv)
-    config_path = Path(args.config).expanduser().resolve()
+    forced = {name.strip() for name in args.force_rerun.split(",") if name.strip()}
+    unknown = forced.difference(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stage(s) for --force-rerun: {', '.join(sorted(unknown))}")
+    config_path = _absolute(args.config)
     if not config_path.exists():
         raise FileNotFoundError(f"Config file not found: {config_path}")
 
@@ -136,18 +192,19 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     if reports != config_reports:
         env_overrides["HVS_PATHS__REPORTS"] = str(reports)
 
+    timings = _absolute(args.stage_timings) if args.stage_timings else None
     sample_output_path: Optional[Path] = None
     if args.sample_size:
         if not args.smi_dir or not args.sample_output:
             raise ValueError("--smi-dir and --sample-output are required when --sample-size is set")
-        sample_output_path = Path(args.sample_output).expanduser().resolve()
+        sample_output_path = _absolute(args.sample_output)
         # Build a temporary ligand CSV via reservoir sampling.  Reuses the main builder script so
         # CLI flags stay consistent across manual and automated workflows.
         builder_cmd = [
             "python",
-            str(Path(__file__).resolve().parent / "build_ligand_library_from_smi.py"),
+            str(SCRIPTS_DIR / "build_ligand_library_from_smi.py"),
             "--input-dir",
-            str(Path(args.smi_dir).expanduser().resolve()),
+            str(_absolute(args.smi_dir)),
             "--output",
             str(sample_output_path),
             "--skip-missing",
@@ -157,66 +214,224 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         ]
         if args.sample_seed is not None:
             builder_cmd.extend(["--seed", str(args.sample_seed)])
-        run_command(builder_cmd, env=os.environ.copy())
+        run_command(builder_cmd, step="ligand sampling", verbose=args.verbose, timings=timings)
         env_overrides["HVS_LIBRARY__LIGANDS_FILE"] = str(sample_output_path)
     elif args.ligand_library:
-        sample_output_path = Path(args.ligand_library).expanduser().resolve()
+        sample_output_path = _absolute(args.ligand_library)
 
-    base_env = os.environ.copy()
-    base_env.update(env_overrides)
+    # One read-only snapshot serves every stage; subprocesses inherit the environment as is
+    # when there is nothing to override.
+    base_env: Mapping[str, str] = MappingProxyType({**os.environ, **env_overrides})
+    stage_env = base_env if env_overrides else None
 
-    duet_cli = shutil.which("duet_screen")
-    if duet_cli:
-        duet_cmd_prefix = [duet_cli]
-    else:
-        duet_cmd_prefix = [sys.executable, "-m", "duet_screen.cli"]
+    commands = list(STAGES)
+    on_stage_done: Optional[Callable[[str], None]] = None
+    if args.incremental:
+        keys = _stage_keys(config_path, config_data, base_env, args.devices)
+        sentinels = workdir / "logs"
+        # Stages form a chain, so only a leading run of current stages can be skipped.
+        while commands and commands[0] not in forced and _stage_is_current(
+            commands[0], keys[commands[0]], sentinels, workdir, reports
+        ):
+            print(f"[run_pipeline] Skipping {commands[0]} (outputs are current)")
+            commands.pop(0)
+        for command in commands:
+            (sentinels / f"{command}.done").unlink(missing_ok=True)
 
-    for command in STAGES:
-        stage_args = [*duet_cmd_prefix, command, "--config", str(config_path)]
-        if command == "dti" and args.devices:
-            stage_args.extend(["--devices", args.devices])
-        # Propagate env overrides (workdir/manifest/reports) to each stage.
-        run_command(stage_args, env=base_env)
+        def record_stage(command: str) -> None:
+            sentinels.mkdir(parents=True, exist_ok=True)
+            (sentinels / f"{command}.done").write_text(keys[command], encoding="utf-8")
+
+        on_stage_done = record_stage
+
+    if args.in_process:
+        run_stages_in_process(
+            config_path,
+            commands,
+            devices=args.devices,
+            env=base_env,
+            on_stage_done=on_stage_done,
+            timings=timings,
+        )
+    else:
+        duet_cmd_prefix = _duet_command()
+        for command in commands:
+            stage_args = [*duet_cmd_prefix, command, "--config", str(config_path)]
+            if command == "dti" and args.devices:
+                stage_args.extend(["--devices", args.devices])
+            # Propagate env overrides (workdir/manifest/reports) to each stage.
+            run_command(
+                stage_args,
+                env=stage_env,
+                step=f"stage {STAGES.index(command) + 1}/{len(STAGES)} {command}",
+                verbose=args.verbose,
+                timings=timings,
+            )
+            if on_stage_done is not None:
+                on_stage_done(command)
 
     if args.export_json or args.export_xlsx:
         aggregate_path = (
-            Path(args.aggregate_path).expanduser().resolve()
+            _absolute(args.aggregate_path)
             if args.aggregate_path
             else workdir / "aggregate" / "final_rankings.json"
         )
         export_args = [
             "python",
-            str(Path(__file__).resolve().parent / "export_results.py"),
+            str(SCRIPTS_DIR / "export_results.py"),
             "--aggregate",
             str(aggregate_path),
             "--limit",
             str(args.export_limit),
         ]
+        # Only the requested formats are written; one exporter run serves both so the aggregate
+        # and libraries are loaded once.
         if args.export_json:
-            export_args.extend(["--output-json", str(Path(args.export_json).expanduser().resolve())])
-        else:
-            export_args.extend(["--output-json", "/dev/null"])
+            export_args.extend(["--output-json", str(_absolute(args.export_json))])
         if args.export_xlsx:
-            export_args.extend(["--output-xlsx", str(Path(args.export_xlsx).expanduser().resolve())])
-        else:
-            export_args.extend(["--output-xlsx", "/dev/null"])
-        ligand_path_for_export = sample_output_path if sample_output_path else args.ligand_library
-        if ligand_path_for_export:
-            export_args.extend(["--ligand-library", str(Path(ligand_path_for_export).expanduser().resolve())])
+            export_args.extend(["--output-xlsx", str(_absolute(args.export_xlsx))])
+        # Set whenever --ligand-library or sampling is used, and already absolute.
+        if sample_output_path:
+            export_args.extend(["--ligand-library", str(sample_output_path)])
         if args.protein_library:
-            export_args.extend(["--protein-library", str(Path(args.protein_library).expanduser().resolve())])
+            export_args.extend(["--protein-library", str(_absolute(args.protein_library))])
 
-        run_command(export_args, env=base_env)
+        run_command(export_args, env=stage_env, step="export", verbose=args.verbose, timings=timings)
 
     return 0
 
 
-def run_command(args: Sequence[str], env: Optional[Dict[str, str]] = None) -> None:
+def run_command(
+    args: Sequence[str],
+    env: Optional[Mapping[str, str]] = None,
+    *,
+    step: Optional[str] = None,
+    verbose: bool = False,
+    timings: Optional[Path] = None,
+) -> None:
+    """Run *args*, logging *step* as progress (the shell-quoted command if verbose or unnamed).
+
+    With *timings*, one JSON line for the step is appended to that file.
+    """
+
     start = time.time()
-    print(f"[run_pipeline] Executing ({time.strftime('%H:%M:%S')}): {' '.join(args)}")
+    shown = shlex.join(args) if verbose or step is None else step
+    print(f"[run_pipeline] Executing ({time.strftime('%H:%M:%S')}): {shown}")
+    before = _usage("children") if timings else None
     subprocess.run(args, check=True, env=env)
     elapsed = time.time() - start
     print(f"[run_pipeline] Completed in {elapsed:.1f}s")
+    if timings:
+        _append_timing(timings, step or shlex.join(args), elapsed, before, _usage("children"))
+
+
+def _usage(who: str) -> Optional[Any]:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_CHILDREN if who == "children" else resource.RUSAGE_SELF)
+
+
+def _append_timing(path: Path, step: str, elapsed: float, before: Optional[Any], after: Optional[Any]) -> None:
+    record: Dict[str, Any] = {"step": step, "wall_s": round(elapsed, 3)}
+    if before is not None and after is not None:
+        record["utime_s"] = round(after.ru_utime - before.ru_utime, 3)
+        record["stime_s"] = round(after.ru_stime - before.ru_stime, 3)
+        # ru_maxrss is a running peak (of this process, or of the largest child), KiB on Linux.
+        record["maxrss_kb"] = after.ru_maxrss
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # One short write per line in append mode, so concurrent runs do not interleave records.
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(record) + "\n")
+
+
+def run_stages_in_process(
+    config_path: Path,
+    commands: Sequence[str] = STAGES,
+    *,
+    devices: Optional[str],
+    env: Mapping[str, str],
+    on_stage_done: Optional[Callable[[str], None]] = None,
+    timings: Optional[Path] = None,
+) -> None:
+    """Run *commands* through duet_screen.cli in this interpreter.
+
+    Imports happen once, and the DTI and docking rows are handed to the next stage in memory
+    instead of being re-read from the results files.
+    """
+
+    try:
+        from duet_screen import cli
+    except ImportError:
+        # Not installed: fall back to the checkout this script lives in.
+        sys.path.insert(0, str(SCRIPTS_DIR.parent))
+        from duet_screen import cli
+
+    handoff: Optional[List[Dict[str, object]]] = None
+    for command in commands:
+        start = time.time()
+        before = _usage("self") if timings else None
+        print(f"[run_pipeline] Running ({time.strftime('%H:%M:%S')}): duet_screen {command} --config {config_path}")
+        collect: Optional[List[Dict[str, object]]] = [] if command in {"dti", "dock"} else None
+        cli.run_stage(
+            command,
+            config_path,
+            devices=devices if command == "dti" and devices else None,
+            environ=env,
+            rows=handoff if command in {"dock", "mmgbsa"} else None,
+            collect=collect,
+        )
+        handoff = collect
+        elapsed = time.time() - start
+        print(f"[run_pipeline] Completed in {elapsed:.1f}s")
+        if timings:
+            step = f"stage {STAGES.index(command) + 1}/{len(STAGES)} {command}"
+            _append_timing(timings, step, elapsed, before, _usage("self"))
+        if on_stage_done is not None:
+            on_stage_done(command)
+
+
+def _stage_keys(
+    config_path: Path, config_data: Dict[str, Any], env: Mapping[str, str], devices: Optional[str]
+) -> Dict[str, str]:
+    """Cache key per stage: a running hash of the config, HVS_* overrides, input files and stages so far."""
+
+    digest = hashlib.sha256(config_path.read_bytes())
+    for key in sorted(name for name in env if name.startswith("HVS_")):
+        digest.update(f"{key}={env[key]}\0".encode("utf-8"))
+    inputs = config_data.get("inputs") or {}
+    library = config_data.get("library") or {}
+    sources = (
+        env.get("HVS_INPUTS__SEQUENCES", inputs.get("sequences")),
+        env.get("HVS_LIBRARY__PROTEINS_FILE", library.get("proteins_file")),
+        env.get("HVS_LIBRARY__LIGANDS_FILE", library.get("ligands_file")),
+    )
+    for source in sources:
+        if not source:
+            continue
+        path = _resolve_path(None, source, config_path)
+        stat = path.stat() if path.exists() else None
+        fingerprint = (stat.st_mtime_ns, stat.st_size) if stat is not None else None
+        digest.update(f"{path}:{fingerprint}\0".encode("utf-8"))
+    keys: Dict[str, str] = {}
+    for command in STAGES:
+        digest.update(f"{command}\0".encode("utf-8"))
+        if command == "dti":
+            digest.update(f"devices={devices}\0".encode("utf-8"))
+        keys[command] = digest.hexdigest()
+    return keys
+
+
+def _stage_is_current(command: str, key: str, sentinels: Path, workdir: Path, reports: Path) -> bool:
+    sentinel = sentinels / f"{command}.done"
+    try:
+        if sentinel.read_text(encoding="utf-8") != key:
+            return False
+    except FileNotFoundError:
+        return False
+    outputs = [workdir / name for name in STAGE_OUTPUTS[command]]
+    if command == "report":
+        outputs.extend(reports / name for name in REPORT_OUTPUTS)
+    return all(path.exists() for path in outputs)
 
 
 def _load_config_data(config_path: Path) -> Dict[str, Any]:  # type: ignore[name-defined]
@@ -225,7 +440,27 @@ def _load_config_data(config_path: Path) -> Dict[str, Any]:  # type: ignore[name
             return json.load(handle)
         if yaml is None:
             raise RuntimeError("PyYAML is required to parse non-JSON config files.")
-        return yaml.safe_load(handle)
+        return yaml.load(handle, Loader=_YAML_LOADER)
+
+
+@lru_cache(maxsize=1)
+def _duet_command() -> Tuple[str, ...]:
+    """Command prefix for a stage: the installed console script, else ``python -m``.
+
+    Looked up once per process, so repeated ``main`` calls skip the PATH scan.
+    """
+
+    duet_cli = shutil.which("duet_screen")
+    if duet_cli:
+        return (duet_cli,)
+    return (sys.executable, "-m", "duet_screen.cli")
+
+
+@lru_cache(maxsize=None)
+def _absolute(value: str) -> Path:
+    """Expand ``~`` and resolve *value*; each distinct argument is resolved once per run."""
+
+    return Path(value).expanduser().resolve()
 
 
 def _resolve_path(
@@ -236,7 +471,7 @@ def _resolve_path(
     default_parent: Optional[Path] = None,
 ) -> Path:
     if override:
-        return Path(override).expanduser().resolve()
+        return _absolute(override)
     if isinstance(default_value, Path):
         base = default_value
     else:
@@ -0,0 +1,37 @@
+import json
+import os
+
+from duet_screen.config import load_config
+
+
+def _write(tmp_path, ligands_csv: str):
+    (tmp_path / "inputs.csv").write_text("id,type,value\nCRBN,protein,MMDKEV\n", encoding="utf-8")
+    (tmp_path / "ligands.csv").write_text(ligands_csv, encoding="utf-8")
+    config = {
+        "pipeline": {"chunk_size": 4},
+        "inputs": {"sequences": "inputs.csv"},
+        "library": {"proteins": [{"id": "IKZF1", "sequence": "MPLGKK"}], "ligands_file": "ligands.csv"},
+        "paths": {"workdir": "workspace"},
+    }
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return path
+
+
+def test_load_config_cache_tracks_env_and_library(tmp_path, monkeypatch):
+    path = _write(tmp_path, "id,smiles\nLENALIDOMIDE,CCO\n")
+    first = load_config(path)
+    assert load_config(path) is first
+
+    monkeypatch.setenv("HVS_PIPELINE__CHUNK_SIZE", "8")
+    overridden = load_config(path)
+    assert overridden is not first
+    assert overridden.pipeline.chunk_size == 8
+    monkeypatch.delenv("HVS_PIPELINE__CHUNK_SIZE")
+
+    ligands = tmp_path / "ligands.csv"
+    ligands.write_text("id,smiles\nLENALIDOMIDE,CCO\nPOMALIDOMIDE,CCN\n", encoding="utf-8")
+    stat = ligands.stat()
+    os.utime(ligands, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    reloaded = load_config(path)
+    assert [ligand.id for ligand in reloaded.library.ligands] == ["LENALIDOMIDE", "POMALIDOMIDE"]
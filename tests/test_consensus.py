@@ -24,3 +24,19 @@ def test_weighted_reciprocal_rank_fusion_orders_descending():
     assert items[0] == "X"
     assert fused["X"] == fused["Y"]
     assert fused["X"] > fused["Z"]
+
+
+
+def test_weighted_reciprocal_rank_fusion_long_lists_match_small_path():
+    pool = [f"C{index}" for index in range(600)]
+    ranks = [pool, pool[::-1], pool[::3] + pool[1::3]]
+    weights = [0.4, 0.0, 0.25]
+    fused = weighted_reciprocal_rank_fusion(ranks, weights, constant=60)
+    expected = {}
+    for ranking, weight in zip(ranks, weights):
+        if weight <= 0:
+            continue
+        for index, candidate in enumerate(ranking, start=1):
+            expected[candidate] = expected.get(candidate, 0.0) + weight / (60 + index)
+    expected = dict(sorted(expected.items(), key=lambda item: item[1], reverse=True))
+    assert list(fused.items()) == list(expected.items())
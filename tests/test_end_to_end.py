@@ -25,11 +25,11 @@ def _write_inputs(path: Path) -> None:
         writer.writerows(rows)
 
 
-def _write_config(path: Path, input_path: Path, workdir: Path) -> None:
+def _write_config(path: Path, input_path: Path, workdir: Path, *, num_workers: int = 1) -> None:
     config = {
         "pipeline": {
             "chunk_size": 1,
-            "num_workers": 1,
+            "num_workers": num_workers,
             "devices": [0],
             "simulator": True,
             "dti_top_k": 3,
@@ -87,3 +87,50 @@ def test_end_to_end_pipeline(tmp_path):
 
     final_txt = (workdir / "reports" / "report.txt").read_text(encoding="utf-8")
     assert "DUET-Screen Report" in final_txt
+
+
+def test_aggregate_process_pool_matches_serial(tmp_path):
+    input_csv = tmp_path / "inputs.csv"
+    _write_inputs(input_csv)
+    rankings = []
+    for num_workers in (1, 2):
+        workdir = tmp_path / f"workspace_{num_workers}"
+        config_path = tmp_path / f"config_{num_workers}.json"
+        _write_config(config_path, input_csv, workdir, num_workers=num_workers)
+        config = load_config(config_path)
+        run_prep(config)
+        run_dti(config)
+        run_docking(config)
+        run_mmgbsa(config)
+        data = json.loads(run_aggregate(config).read_text(encoding="utf-8"))
+        rankings.append((data["inputs"], data["global_ranking"]))
+    assert rankings[0] == rankings[1]
+
+
+def test_docking_from_collected_dti_rows_matches_file(tmp_path):
+    input_csv = tmp_path / "inputs.csv"
+    _write_inputs(input_csv)
+    workdir = tmp_path / "workspace"
+    config_path = tmp_path / "config.json"
+    _write_config(config_path, input_csv, workdir)
+    config = load_config(config_path)
+    run_prep(config)
+    collected = []
+    run_dti(config, collect=collected)
+    from_file = run_docking(config).read_bytes()
+    assert run_docking(config, rows=collected).read_bytes() == from_file
+
+
+def test_mmgbsa_from_collected_docking_rows_matches_file(tmp_path):
+    input_csv = tmp_path / "inputs.csv"
+    _write_inputs(input_csv)
+    workdir = tmp_path / "workspace"
+    config_path = tmp_path / "config.json"
+    _write_config(config_path, input_csv, workdir)
+    config = load_config(config_path)
+    run_prep(config)
+    run_dti(config)
+    collected = []
+    run_docking(config, collect=collected)
+    from_file = run_mmgbsa(config).read_bytes()
+    assert run_mmgbsa(config, rows=collected).read_bytes() == from_file
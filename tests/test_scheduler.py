@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 
 from duet_screen.scheduler import GPUScheduler, RetryableError, Task
@@ -38,3 +40,66 @@ def test_scheduler_retry_handling():
     task, device, value = results[0]
     assert value == "ok"
     assert attempts == [0, 1]
+
+
+def test_scheduler_thread_executor_matches_serial_order():
+    failed = set()
+
+    def make_tasks():
+        return [Task(name=f"task_{idx}", payload=idx) for idx in range(5)]
+
+    def worker(task, device):
+        if task.payload == 1 and task.name not in failed:
+            failed.add(task.name)
+            raise RetryableError("transient failure")
+        return task.payload * 2
+
+    serial = GPUScheduler([0, 1], max_retries=1).dispatch(make_tasks(), worker)
+    failed.clear()
+    threaded = GPUScheduler([0, 1], max_retries=1, executor="thread").dispatch(make_tasks(), worker)
+
+    def summary(results):
+        return [(task.name, device, value) for task, device, value in results]
+
+    assert summary(threaded) == summary(serial)
+    assert [value for _, _, value in serial] == [0, 4, 6, 8, 2]
+
+
+def _double_payload(task, device):
+    return task.payload * 2
+
+
+def test_scheduler_process_executor_reuses_pool_across_dispatches():
+    scheduler = GPUScheduler([0, 1], executor="process")
+
+    for _ in range(2):
+        tasks = [Task(name=f"task_{idx}", payload=idx) for idx in range(3)]
+        results = scheduler.dispatch(tasks, _double_payload)
+        assert [(task.name, device, value) for task, device, value in results] == [
+            ("task_0", 0, 0),
+            ("task_1", 1, 2),
+            ("task_2", 0, 4),
+        ]
+
+
+def test_scheduler_workstealing_balances():
+    scheduler = GPUScheduler([0, 1], max_retries=0)
+    tasks = [Task(name=f"task_{idx}", payload=idx) for idx in range(6)]
+    fast_done = threading.Event()
+    fast_count = []
+
+    def worker(task, device):
+        if device == 1:
+            # The slow device holds its first task until the fast one has done the rest.
+            fast_done.wait(timeout=5)
+        else:
+            fast_count.append(task.name)
+            if len(fast_count) == len(tasks) - 1:
+                fast_done.set()
+        return task.payload * 2
+
+    results = scheduler.dispatch_workstealing(tasks, worker)
+    placements = [device for _, device, _ in results]
+    assert sorted(task.name for task, _, _ in results) == [task.name for task in tasks]
+    assert placements.count(0) >= len(tasks) - 1
+    assert placements.count(1) <= 1
@@ -0,0 +1,31 @@
+from duet_screen.utils import (
+    deterministic_score,
+    deterministic_scores,
+    iter_csv_columns,
+    read_jsonl,
+    read_jsonl_chunks,
+    write_jsonl,
+)
+
+
+def test_deterministic_scores_matches_scalar():
+    pairs = [("CRBN", "LENALIDOMIDE"), ("CRBN", "POMALIDOMIDE"), ("IKZF1", "LENALIDOMIDE")]
+    batch = deterministic_scores(pairs, "mmgbsa")
+    assert batch == [deterministic_score(first, second, "mmgbsa") for first, second in pairs]
+    assert deterministic_scores([], "mmgbsa") == []
+
+
+def test_iter_csv_columns_resolves_aliases(tmp_path):
+    path = tmp_path / "ligands.csv"
+    path.write_text("zinc_id,SMILES,value\nZ1,CCO,\nZ2,,CCN\n\nZ3\n", encoding="utf-8")
+    rows = list(iter_csv_columns(path, ("id", "zinc_id"), ("smiles", "SMILES", "value")))
+    assert rows == [("Z1", "CCO"), ("Z2", "CCN"), ("Z3", None)]
+
+
+def test_read_jsonl_chunks_handles_block_boundaries(tmp_path):
+    path = tmp_path / "rows.jsonl"
+    rows = [{"input_id": f"I{index}", "score": index / 3} for index in range(50)]
+    write_jsonl(path, rows)
+    chunks = list(read_jsonl_chunks(path, chunk_bytes=64))
+    assert len(chunks) > 1
+    assert [row for chunk in chunks for row in chunk] == rows == list(read_jsonl(path))